@@ -1,5 +1,8 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import HTMLResponse, PlainTextResponse
+import asyncio
+import base64
+
+from fastapi import BackgroundTasks, FastAPI, HTTPException
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from typing import Any, Optional
 from app.core.config import load_settings
@@ -189,8 +192,24 @@ def add_document(case_id: str, payload: DocumentCreate):
     return {"doc_id": doc_id}
 
 
+def _schedule_vector_indexing(background_tasks: BackgroundTasks, case_id: str, doc_id: str, distill_result: Any) -> None:
+    """Embeds the distilled document and its facts into the search index after the response is sent."""
+    from vendor.findistill.services.embedder import embedder
+    from vendor.findistill.services.vector_index import index_distilled_quietly, vector_index
+    if vector_index is None or not embedder.api_key:
+        return
+    metadata = distill_result.metadata or {}
+    result = {
+        "title": metadata.get("title") or doc_id,
+        "summary": metadata.get("summary") or "",
+        "facts": distill_result.facts,
+        "metadata": metadata,
+    }
+    background_tasks.add_task(index_distilled_quietly, doc_id, result, case_id)
+
+
 @app.post("/cases/{case_id}/distill", response_model=DistillResponse)
-async def distill(case_id: str):
+async def distill(case_id: str, background_tasks: BackgroundTasks):
     case = _db.get_case(case_id)
     if not case:
         raise HTTPException(status_code=404, detail="case not found")
@@ -203,6 +222,7 @@ async def distill(case_id: str):
         document = next((d.get("payload", {}) for d in documents if d.get("doc_id") == doc_id), {})
     distill_result = await _distill.extract(document)
     _db.save_distill(case_id, distill_result)
+    _schedule_vector_indexing(background_tasks, case_id, doc_id, distill_result)
     return DistillResponse(
         facts=distill_result.facts,
         cot_markdown=distill_result.cot_markdown,
@@ -416,6 +436,23 @@ async def toolkit_distill(payload: dict[str, Any]):
     result = await _toolkit.distill_document(file_bytes, filename, mime_type)
     return result
 
+@app.post("/api/v1/toolkit/distill/jsonl")
+async def toolkit_distill_jsonl(payload: dict[str, Any]):
+    """B2B Endpoint streaming the distilled JSONL training corpus (application/x-ndjson)."""
+    content_b64 = payload.get("content_base64")
+    if not content_b64:
+        raise HTTPException(status_code=400, detail="content_base64 required")
+
+    file_bytes = base64.b64decode(content_b64)
+    filename = payload.get("filename", "api_upload.pdf")
+    mime_type = payload.get("mime_type", "application/pdf")
+
+    try:
+        lines = await _toolkit.distill_jsonl(file_bytes, filename, mime_type)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
 @app.post("/api/v1/toolkit/predict")
 async def toolkit_predict(payload: dict[str, Any]):
     """B2B Endpoint for causal impact simulation."""
@@ -439,6 +476,89 @@ async def toolkit_verify(payload: dict[str, Any]):
     return {"integrity_valid": is_valid}
 
 
+# --- DISTILL CACHE API ENDPOINTS ---
+
+@app.get("/api/v1/distill/cache")
+def distill_cache_inspect(limit: int = 100):
+    """Cache statistics plus the most recently used entries."""
+    if _distill.cache is None:
+        raise HTTPException(status_code=404, detail="distill cache disabled")
+    return {"stats": _distill.cache.stats(), "entries": _distill.cache.entries(limit)}
+
+@app.delete("/api/v1/distill/cache")
+def distill_cache_purge(key: Optional[str] = None):
+    """Purges one cache entry by key, or the whole cache when no key is given."""
+    if _distill.cache is None:
+        raise HTTPException(status_code=404, detail="distill cache disabled")
+    return {"purged": _distill.cache.purge(key)}
+
+@app.get("/api/v1/distill/rate-limit")
+def distill_rate_limit_stats():
+    """Counters of the process-wide Gemini rate limiter (requests, 429s, retries, waits)."""
+    from vendor.findistill.services.rate_limiter import gemini_limiter
+    return gemini_limiter.stats()
+
+@app.get("/api/v1/distill/fact-sink")
+def fact_sink_stats():
+    """Counters of the background fact export queue (queued, written, retries, failed, pending)."""
+    from vendor.findistill.services.fact_sink import get_fact_sink
+    sink = get_fact_sink()
+    if sink is None:
+        raise HTTPException(status_code=404, detail="fact export disabled")
+    return sink.stats()
+
+@app.get("/api/v1/distill/llm-cache")
+def llm_cache_inspect(limit: int = 100):
+    """Gemini response cache statistics plus the most recently used entries."""
+    from vendor.findistill.services.llm_cache import llm_cache
+    if llm_cache is None:
+        raise HTTPException(status_code=404, detail="LLM cache disabled")
+    return {"stats": llm_cache.stats(), "entries": llm_cache.entries(limit)}
+
+@app.delete("/api/v1/distill/llm-cache")
+def llm_cache_purge(key: Optional[str] = None):
+    """Purges one Gemini response by key, or the whole cache when no key is given."""
+    from vendor.findistill.services.llm_cache import llm_cache
+    if llm_cache is None:
+        raise HTTPException(status_code=404, detail="LLM cache disabled")
+    return {"purged": llm_cache.purge(key)}
+
+
+# --- VECTOR SEARCH API ENDPOINTS ---
+
+@app.post("/api/v1/search")
+async def vector_search(payload: dict[str, Any]):
+    """
+    Semantic search over distilled documents and facts.
+    Body: {"query": str} or {"vector": [...]}, optional "k", "nprobe" and "filters"
+    ({"case_id", "company", "period", "kind", "doc_id"}; a list value matches any of).
+    """
+    from vendor.findistill.services.vector_index import vector_index
+    if vector_index is None:
+        raise HTTPException(status_code=404, detail="vector index disabled")
+    vector = payload.get("vector")
+    if vector is None:
+        query = str(payload.get("query") or "").strip()
+        if not query:
+            raise HTTPException(status_code=400, detail="query or vector required")
+        from vendor.findistill.services.embedder import embedder
+        vector = await embedder.generate_query_embedding(query)
+    try:
+        k = int(payload.get("k", 10))
+        nprobe = int(payload["nprobe"]) if payload.get("nprobe") is not None else None
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="k and nprobe must be integers")
+    if k < 1 or (nprobe is not None and nprobe < 1):
+        raise HTTPException(status_code=400, detail="k and nprobe must be positive")
+    try:
+        # The index is NumPy/disk work (and loads its log on first use): keep it off the event loop.
+        results = await asyncio.to_thread(vector_index.search, vector, k, payload.get("filters"), nprobe)
+        stats = await asyncio.to_thread(vector_index.stats)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"results": results, "stats": stats}
+
+
 # --- GLOBAL INTERCONNECTEDNESS API ENDPOINTS ---
 
 @app.get("/api/v1/global/contagion")
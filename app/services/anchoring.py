@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import atexit
+import heapq
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# (x0, y0, x1, y1, normalized_token, block_no, line_no) — plain tuples so that
+# page word lists can be pickled across process boundaries.
+WordBox = Tuple[float, float, float, float, str, int, int]
+
+ANCHOR_WORKERS = int(os.getenv("ANCHOR_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+# Documents with at least this many pages are anchored in a process pool.
+ANCHOR_PARALLEL_MIN_PAGES = int(os.getenv("ANCHOR_PARALLEL_MIN_PAGES", "64"))
+
+_EDGE_PUNCT = "\"'()[]{}<>:;,.!?$€£¥₩%*"
+_EMPTY: Set[str] = set()
+
+
+def normalize_token(text: str) -> str:
+    token = text.lower().strip(_EDGE_PUNCT)
+    if any(ch.isdigit() for ch in token):
+        token = token.replace(",", "")
+    return token
+
+
+def extract_page_words(page: Any) -> List[WordBox]:
+    """Read a PyMuPDF page's words (reading order) as normalized WordBox tuples."""
+    words: List[WordBox] = []
+    for x0, y0, x1, y1, text, block_no, line_no, _word_no in page.get_text("words"):
+        token = normalize_token(text)
+        if token:
+            words.append((x0, y0, x1, y1, token, block_no, line_no))
+    return words
+
+
+def anchor_search_candidates(fact: Dict[str, Any]) -> Tuple[List[str], Optional[str]]:
+    """Search terms for a fact in priority order, plus the label used for partial matches."""
+    candidates: List[str] = []
+
+    # Priority 1: Exact statement (full context)
+    if fact.get("statement"):
+        candidates.append(fact["statement"])
+
+    # Priority 2: Label + Value, then the label alone
+    label = fact.get("label") or fact.get("metric")
+    value = str(fact.get("value", ""))
+    if label and value:
+        candidates.append(f"{label} {value}")
+    if label:
+        candidates.append(label)
+
+    # Priority 3: Just the value (only if reasonably long)
+    if len(value) >= 3 and value not in ("None", "0", "0.0"):
+        candidates.append(value)
+
+    seen = set()
+    ordered: List[str] = []
+    for term in candidates:
+        term = str(term)
+        if len(term.strip()) < 2 or term in seen:
+            continue
+        seen.add(term)
+        ordered.append(term)
+    return ordered, label
+
+
+@dataclass(frozen=True)
+class AnchorHit:
+    page: int  # 0-based page index
+    box: Tuple[float, float, float, float]
+    term: str
+
+
+class PDFAnchorIndex:
+    """
+    Inverted word index over a PDF's text layer, built once per document.
+
+    Terms are matched like PyMuPDF's `search_for` (case-insensitive, the phrase
+    may start mid-word and end mid-word), but against token postings instead of
+    a native search per page: a character-trigram index over the vocabulary finds
+    the tokens that can start a match, and the remaining tokens are verified
+    against consecutive words. Hits are returned in page/reading order.
+    """
+
+    def __init__(self, pages: Dict[int, List[WordBox]]) -> None:
+        self._pages = pages
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for page_idx in sorted(pages):
+            for pos, word in enumerate(pages[page_idx]):
+                self._postings[word[4]].append((page_idx, pos))
+
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+        for token in self._postings:
+            for gram in self._grams(token):
+                self._trigrams[gram].add(token)
+
+        self._vocab_cache: Dict[Tuple[str, str], List[str]] = {}
+        self._find_cache: Dict[str, Optional[AnchorHit]] = {}
+
+    @classmethod
+    def from_document(cls, doc: Any, page_numbers: Optional[Iterable[int]] = None) -> "PDFAnchorIndex":
+        numbers = range(len(doc)) if page_numbers is None else page_numbers
+        return cls({idx: extract_page_words(doc[idx]) for idx in numbers})
+
+    def find(self, term: str) -> Optional[AnchorHit]:
+        """First occurrence of `term` in page/reading order."""
+        if term in self._find_cache:
+            return self._find_cache[term]
+
+        tokens = [tok for tok in (normalize_token(part) for part in term.split()) if tok]
+        hit = None
+        if tokens:
+            mode = "contains" if len(tokens) == 1 else "suffix"
+            starts = self._vocab(tokens[0], mode)
+            postings = [self._postings[token] for token in starts]
+            for page_idx, pos in heapq.merge(*postings):
+                if self._matches_at(page_idx, pos, tokens):
+                    hit = AnchorHit(page=page_idx, box=self._box(page_idx, pos, len(tokens)), term=term)
+                    break
+
+        self._find_cache[term] = hit
+        return hit
+
+    def resolve(self, fact: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Best anchor for a fact: the earliest page on which any candidate matches,
+        preferring the highest-priority candidate on that page.
+        """
+        candidates, label = anchor_search_candidates(fact)
+        return merge_anchor_hits([self.best_hits(candidates, label)])
+
+    def best_hits(self, candidates: List[str], label: Optional[str]) -> Tuple[Optional[AnchorHit], Optional[AnchorHit]]:
+        """(precise, partial) hits; the partial first-word hit is only looked up without a precise one."""
+        best: Optional[AnchorHit] = None
+        for term in candidates:
+            hit = self.find(term)
+            if hit and (best is None or hit.page < best.page):
+                best = hit
+        if best:
+            return best, None
+
+        # Fallback: first word of a multi-word label
+        if label:
+            words = str(label).split()
+            if len(words) > 1:
+                return None, self.find(words[0])
+        return None, None
+
+    def _vocab(self, token: str, mode: str) -> List[str]:
+        key = (token, mode)
+        cached = self._vocab_cache.get(key)
+        if cached is not None:
+            return cached
+
+        if len(token) < 3:
+            matches = [token] if token in self._postings else []
+        else:
+            grams = sorted((self._trigrams.get(g, _EMPTY) for g in self._grams(token)), key=len)
+            pool = set(grams[0]).intersection(*grams[1:]) if grams else set()
+            if mode == "suffix":
+                matches = [tok for tok in pool if tok.endswith(token)]
+            elif mode == "prefix":
+                matches = [tok for tok in pool if tok.startswith(token)]
+            else:
+                matches = [tok for tok in pool if token in tok]
+
+        self._vocab_cache[key] = matches
+        return matches
+
+    def _matches_at(self, page_idx: int, pos: int, tokens: List[str]) -> bool:
+        words = self._pages[page_idx]
+        last = len(tokens) - 1
+        if pos + last >= len(words):
+            return False
+        for offset in range(1, last + 1):
+            word_token = words[pos + offset][4]
+            if offset == last:
+                if not word_token.startswith(tokens[offset]):
+                    return False
+            elif word_token != tokens[offset]:
+                return False
+        return True
+
+    def _box(self, page_idx: int, pos: int, length: int) -> Tuple[float, float, float, float]:
+        words = self._pages[page_idx]
+        first = words[pos]
+        x0, y0, x1, y1 = first[0], first[1], first[2], first[3]
+        # Like search_for()[0], keep the part of the match on the first line.
+        for word in words[pos + 1:pos + length]:
+            if (word[5], word[6]) != (first[5], first[6]):
+                break
+            x0, y0 = min(x0, word[0]), min(y0, word[1])
+            x1, y1 = max(x1, word[2]), max(y1, word[3])
+        return (x0, y0, x1, y1)
+
+    @staticmethod
+    def _grams(token: str) -> Set[str]:
+        return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def _anchor_dict(hit: AnchorHit, match_type: str) -> Dict[str, Any]:
+    return {
+        "page": hit.page + 1,
+        "box": list(hit.box),
+        "match_term": hit.term,
+        "match_type": match_type,
+    }
+
+
+def merge_anchor_hits(shard_hits: Iterable[Tuple[Optional[AnchorHit], Optional[AnchorHit]]]) -> Optional[Dict[str, Any]]:
+    """
+    Merge per-shard (precise, partial) hits for one fact. Shards cover disjoint
+    pages, so the earliest-page precise hit wins, then the earliest partial.
+    """
+    precise: Optional[AnchorHit] = None
+    partial: Optional[AnchorHit] = None
+    for shard_precise, shard_partial in shard_hits:
+        if shard_precise and (precise is None or shard_precise.page < precise.page):
+            precise = shard_precise
+        if shard_partial and (partial is None or shard_partial.page < partial.page):
+            partial = shard_partial
+    if precise:
+        return _anchor_dict(precise, "precise")
+    if partial:
+        return _anchor_dict(partial, "partial")
+    return None
+
+
+def shard_pages(page_count: int, shards: int) -> List[Tuple[int, int]]:
+    """Split [0, page_count) into at most `shards` contiguous (start, stop) ranges."""
+    shards = max(1, min(shards, page_count))
+    size, extra = divmod(page_count, shards)
+    ranges: List[Tuple[int, int]] = []
+    start = 0
+    for idx in range(shards):
+        stop = start + size + (1 if idx < extra else 0)
+        if stop > start:
+            ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _anchor_shard(
+    pdf_path: str,
+    start: int,
+    stop: int,
+    queries: List[Tuple[List[str], Optional[str]]],
+) -> List[Tuple[Optional[AnchorHit], Optional[AnchorHit]]]:
+    """Process-pool worker: index pages [start, stop) of the PDF on disk and resolve all queries."""
+    import fitz  # PyMuPDF, imported in the worker process
+
+    doc = fitz.open(pdf_path)
+    try:
+        index = PDFAnchorIndex.from_document(doc, range(start, stop))
+    finally:
+        doc.close()
+    return [index.best_hits(candidates, label) for candidates, label in queries]
+
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _POOL
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool (a worker died) so the next call starts a fresh one."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _shutdown_pool() -> None:
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(_shutdown_pool)
+
+
+def anchor_facts_parallel(
+    file_bytes: bytes,
+    page_count: int,
+    facts: List[Dict[str, Any]],
+    workers: int = ANCHOR_WORKERS,
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Resolve anchors for `facts` with pages sharded across a process pool.
+
+    The PDF is written once to a temp file that every worker opens by path, so
+    only the (deduplicated) search candidates are pickled to the workers.
+    Returns one anchor (or None) per fact, in input order.
+    """
+    query_ids: Dict[Tuple[Tuple[str, ...], Optional[str]], int] = {}
+    queries: List[Tuple[List[str], Optional[str]]] = []
+    fact_queries: List[int] = []
+    for fact in facts:
+        candidates, label = anchor_search_candidates(fact)
+        key = (tuple(candidates), label)
+        if key not in query_ids:
+            query_ids[key] = len(queries)
+            queries.append((candidates, label))
+        fact_queries.append(query_ids[key])
+
+    fd, pdf_path = tempfile.mkstemp(suffix=".pdf", prefix="anchor_")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(file_bytes)
+        pool = _get_pool(workers)
+        try:
+            futures = [
+                pool.submit(_anchor_shard, pdf_path, start, stop, queries)
+                for start, stop in shard_pages(page_count, workers)
+            ]
+            # Futures are collected in page order, so the merge is deterministic.
+            shard_results = [future.result() for future in futures]
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            raise
+    finally:
+        try:
+            os.unlink(pdf_path)
+        except OSError:
+            pass
+
+    resolved = [merge_anchor_hits(shard[q] for shard in shard_results) for q in range(len(queries))]
+    return [resolved[q] for q in fact_queries]
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from app.services.types import DistillResult
+
+DISTILL_CACHE_ENABLED = os.getenv("DISTILL_CACHE_ENABLED", "1") == "1"
+DISTILL_CACHE_PATH = os.getenv("DISTILL_CACHE_PATH", ".cache/distill_cache.sqlite3")
+DISTILL_CACHE_MAX_MB = float(os.getenv("DISTILL_CACHE_MAX_MB", "512"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS distill_cache (
+    key TEXT PRIMARY KEY,
+    filename TEXT,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS distill_cache_lru ON distill_cache (last_access);
+"""
+
+
+def _encode(value: Any) -> Dict[str, str]:
+    """JSON `default` for the types facts carry beyond JSON's own; tagged so `_decode` restores them."""
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    raise TypeError(f"{type(value).__name__} values are not cacheable")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        (tag, value), = obj.items()
+        if tag == "__decimal__":
+            return Decimal(value)
+        if tag == "__datetime__":
+            return datetime.fromisoformat(value)
+        if tag == "__date__":
+            return date.fromisoformat(value)
+    return obj
+
+
+def distill_cache_key(file_bytes: bytes, pipeline_version: str, config: Dict[str, Any]) -> str:
+    """SHA-256 over the document bytes, the pipeline version and the output-relevant config."""
+    digest = hashlib.sha256()
+    digest.update(hashlib.sha256(file_bytes).digest())
+    digest.update(pipeline_version.encode("utf-8"))
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class DistillCache:
+    """
+    On-disk, size-bounded LRU cache of DistillResults, stored in SQLite.
+
+    The database is opened lazily on first use (WAL mode, one connection shared
+    under a lock). Entries are JSON payloads with Decimal/datetime/date values
+    tagged, so a hit returns the same types as the run that stored it (results
+    holding other non-JSON types are not cached); when the total payload size
+    exceeds `max_bytes`, the least recently read entries are evicted.
+    """
+
+    def __init__(self, path: str = DISTILL_CACHE_PATH, max_bytes: int = int(DISTILL_CACHE_MAX_MB * 1024 * 1024)) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["DistillCache"]:
+        return cls() if DISTILL_CACHE_ENABLED else None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[DistillResult]:
+        try:
+            row = self._read(key)
+        except sqlite3.Error as exc:
+            print(f"[DistillCache] lookup failed, running pipeline: {exc}")
+            return None
+        if row is None:
+            return None
+        payload = json.loads(row[0], object_hook=_decode)
+        return DistillResult(
+            facts=payload.get("facts", []),
+            cot_markdown=payload.get("cot_markdown", ""),
+            metadata=payload.get("metadata", {}),
+            source_anchors=payload.get("source_anchors", {}),
+        )
+
+    def _read(self, key: str) -> Optional[tuple]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT payload FROM distill_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE distill_cache SET last_access = ?, hit_count = hit_count + 1 WHERE key = ?",
+                (time.time(), key),
+            )
+            conn.commit()
+            self.hits += 1
+        return row
+
+    def put(self, key: str, result: DistillResult, filename: str = "") -> None:
+        try:
+            payload = json.dumps(
+                {
+                    "facts": result.facts,
+                    "cot_markdown": result.cot_markdown,
+                    "metadata": result.metadata,
+                    "source_anchors": result.source_anchors,
+                },
+                ensure_ascii=False,
+                default=_encode,
+            ).encode("utf-8")
+        except (TypeError, ValueError) as exc:
+            print(f"[DistillCache] not caching {filename or key}: {exc}")
+            return
+        if len(payload) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO distill_cache (key, filename, size, created_at, last_access, hit_count, payload) "
+                    "VALUES (?, ?, ?, ?, ?, 0, ?)",
+                    (key, filename, len(payload), now, now, payload),
+                )
+                self._evict(conn)
+                conn.commit()
+        except sqlite3.Error as exc:
+            print(f"[DistillCache] store failed: {exc}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM distill_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM distill_cache ORDER BY last_access ASC"):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM distill_cache WHERE key = ?", victims)
+
+    def entries(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recently used entries first (metadata only, no payloads)."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT key, filename, size, created_at, last_access, hit_count "
+                "FROM distill_cache ORDER BY last_access DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        columns = ("key", "filename", "size", "created_at", "last_access", "hit_count")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM distill_cache"
+            ).fetchone()
+        return {
+            "path": self.path,
+            "entries": count,
+            "total_bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def purge(self, key: Optional[str] = None) -> int:
+        """Delete one entry (or all entries when `key` is None); returns the number removed."""
+        with self._lock:
+            conn = self._connect()
+            if key is None:
+                cursor = conn.execute("DELETE FROM distill_cache")
+            else:
+                cursor = conn.execute("DELETE FROM distill_cache WHERE key = ?", (key,))
+            conn.commit()
+            return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,27 +1,33 @@
+import asyncio
 import base64
 import os
 import io
-from dataclasses import dataclass
+from dataclasses import asdict
 from collections import defaultdict
 from copy import deepcopy
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 try:
     import fitz  # PyMuPDF
 except ImportError:
     fitz = None
 
+from app.services.anchoring import (
+    ANCHOR_PARALLEL_MIN_PAGES,
+    ANCHOR_WORKERS,
+    PDFAnchorIndex,
+    anchor_facts_parallel,
+)
+from app.services.distill_cache import DistillCache, distill_cache_key
+from app.services.reflection import ReflectionEngine
+from app.services.symbolic_validation import (
+    SymbolicRule,
+    SymbolicValidator,
+    calculation_rules_to_identities,
+)
 from app.services.types import DistillResult
 from app.services.zkp_validator import ZKPValidator
 
-@dataclass
-class SymbolicRule:
-    rule_id: str
-    target_metric: str
-    component_metrics: List[str]
-    operation: str  # "sum", "difference"
-    description: str
-
 class DistillEngine:
     async def extract(self, document: Dict[str, Any]) -> DistillResult:
         raise NotImplementedError
@@ -61,6 +67,24 @@ class FinDistillAdapter(DistillEngine):
         )
     ]
 
+    # Bump whenever a change alters extracted facts, so cached results are not reused.
+    PIPELINE_VERSION = "findistill-2026.10"
+
+    _NO_CACHE = object()
+
+    def __init__(
+        self,
+        symbolic_validator: Optional[SymbolicValidator] = None,
+        cache: Any = _NO_CACHE,
+    ) -> None:
+        self.symbolic_validator = symbolic_validator or SymbolicValidator(self.ACCOUNTING_IDENTITIES)
+        # Pass cache=None to disable; by default configured from DISTILL_CACHE_* env vars.
+        self.cache: Optional[DistillCache] = DistillCache.from_env() if cache is self._NO_CACHE else cache
+
+    def register_identity(self, rule: SymbolicRule) -> None:
+        """Add (or replace, by rule_id) a custom accounting identity for this adapter."""
+        self.symbolic_validator.register_identity(rule)
+
     async def extract(self, document: Dict[str, Any]) -> DistillResult:
         document_metadata = document.get("metadata") or {}
         zkp_payload = document_metadata.get("zkp_proof")
@@ -109,7 +133,15 @@ class FinDistillAdapter(DistillEngine):
         if file_bytes is None:
             return DistillResult(facts=[], cot_markdown="", metadata={"error": "no content"})
 
+        cache_key = None
+        if self.cache is not None:
+            cache_key = distill_cache_key(file_bytes, self.PIPELINE_VERSION, self._cache_config(filename, mime_type))
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                return self._finalize_result(cached, document, verification if zkp_payload is not None else None, cache_key, True)
+
         try:
+            from vendor.findistill.services.exporter import exporter
             from vendor.findistill.services.ingestion import ingestion_service
             from vendor.findistill.services.normalizer import normalizer
         except Exception as exc:
@@ -124,20 +156,26 @@ class FinDistillAdapter(DistillEngine):
 
         facts = normalized.get("facts", [])
         reasoning_qa = normalized.get("reasoning_qa", [])
-        jsonl_data = normalized.get("jsonl_data", [])
 
-        if jsonl_data:
-            cot = "\n".join(jsonl_data)
+        # The CoT is the filing's JSONL corpus, rendered line by line from jsonl_context
+        # (or pre-rendered jsonl_data); otherwise the QA responses themselves.
+        if (reasoning_qa and normalized.get("jsonl_context")) or normalized.get("jsonl_data"):
+            cot = "\n".join(exporter.iter_jsonl(normalized))
         elif reasoning_qa:
-            cot = "\n\n".join([qa.get("response", "") for qa in reasoning_qa])
+            cot = "\n\n".join(qa.get("response", "") for qa in reasoning_qa)
         else:
             cot = ""
 
-        reflected_facts, reflection_summary = self._self_reflect_facts(facts, max_rounds=2)
+        reflected_facts, reflection_summary = self._self_reflect_facts(
+            facts,
+            max_rounds=2,
+            calculation_rules=normalized.get("calculation_rules"),
+        )
 
         # Pixel-Level Data Lineage: Enrich facts with coordinates from PDF
+        # (CPU-bound: run off the event loop so other requests stay responsive)
         if mime_type == "application/pdf":
-            reflected_facts = self._enrich_with_source_anchors(reflected_facts, file_bytes)
+            reflected_facts = await asyncio.to_thread(self._enrich_with_source_anchors, reflected_facts, file_bytes)
             
         # Pillar 1: Agentic Ontology Self-Correction
         reflected_facts = self._self_heal_ontology_links(reflected_facts)
@@ -145,129 +183,190 @@ class FinDistillAdapter(DistillEngine):
         # Pillar 1+4: Kinetic Action Extraction (Extracting potential strategies as nodes)
         reflected_facts = self._extract_kinetic_actions(reflected_facts, cot)
 
+        result = DistillResult(
+            facts=reflected_facts,
+            cot_markdown=cot,
+            metadata={
+                "title": normalized.get("title"),
+                "summary": normalized.get("summary"),
+                "self_reflection": reflection_summary,
+            },
+        )
+        # Failed or degraded parses are not cached so that a retry re-runs the pipeline.
+        if cache_key is not None and self._cacheable(normalized, mime_type):
+            await asyncio.to_thread(self.cache.put, cache_key, result, filename)
+
+        return self._finalize_result(result, document, verification if zkp_payload is not None else None, cache_key, False)
+
+    @staticmethod
+    def _cacheable(normalized: Dict[str, Any], mime_type: str) -> bool:
+        """
+        Whether a pipeline result may be cached. Not when it failed or degraded:
+        an LLM error answered by a local fallback, some PDF page windows
+        lost, or a PDF/image that came back through the HTML text fallback.
+        """
+        metadata = normalized.get("metadata") or {}
+        if metadata.get("error") or metadata.get("degraded"):
+            return False
+        if (metadata.get("pdf_chunks") or {}).get("failed"):
+            return False
+        is_document = mime_type == "application/pdf" or mime_type.startswith("image/")
+        return not (is_document and metadata.get("file_type") == "html_unstructured")
+
+    def _cache_config(self, filename: str, mime_type: str) -> Dict[str, Any]:
+        """Config that changes the distilled output for identical bytes (part of the cache key)."""
+        config: Dict[str, Any] = {
+            "mime_type": mime_type,
+            "extension": os.path.splitext(filename)[1].lower(),
+            "llm_enabled": bool(os.getenv("GEMINI_API_KEY")),
+            "symbolic_rules": [asdict(rule) for rule in self.symbolic_validator.rules],
+        }
+        try:
+            from vendor.findistill.services import pdf_splitter, pdf_table_extractor
+            from vendor.findistill.services.ingestion import ingestion_service
+        except Exception:
+            return config  # the pipeline itself will fail to import; nothing is cached
+        # The values the pipeline actually runs with (read from the env at import).
+        config.update(
+            llm_model=ingestion_service.gemini.model_name,
+            pdf_local_tables=pdf_table_extractor.PDF_LOCAL_TABLES,
+            pdf_local_min_confidence=pdf_table_extractor.PDF_LOCAL_MIN_CONFIDENCE,
+            pdf_chunk_pages=pdf_splitter.PDF_CHUNK_PAGES,
+        )
+        return config
+
+    @staticmethod
+    def _finalize_result(
+        result: DistillResult,
+        document: Dict[str, Any],
+        zkp_verification: Optional[Dict[str, Any]],
+        cache_key: Optional[str],
+        cache_hit: bool,
+    ) -> DistillResult:
+        """Attach per-request metadata (document identity, ZKP check, cache status) to a pipeline result."""
         metadata = {
             "source": document.get("source", "upload"),
             "doc_id": document.get("doc_id", ""),
-            "title": normalized.get("title"),
-            "summary": normalized.get("summary"),
-            "self_reflection": reflection_summary,
+            **result.metadata,
         }
-        if zkp_payload is not None:
-            metadata["zkp_verification"] = verification
-
-        return DistillResult(facts=reflected_facts, cot_markdown=cot, metadata=metadata)
+        if zkp_verification is not None:
+            metadata["zkp_verification"] = zkp_verification
+        if cache_key is not None:
+            metadata["cache"] = {"key": cache_key, "hit": cache_hit}
+
+        return DistillResult(
+            facts=result.facts,
+            cot_markdown=result.cot_markdown,
+            metadata=metadata,
+            source_anchors=result.source_anchors,
+        )
 
-    def _self_reflect_facts(self, facts: List[Any], max_rounds: int = 2) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    def _self_reflect_facts(
+        self,
+        facts: List[Any],
+        max_rounds: int = 2,
+        calculation_rules: Optional[Iterable[Sequence[Any]]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
         """
         FinReflectKG-inspired self-reflection loop:
         1) Critique extracted facts
         2) Repair low-quality facts
         3) Re-check until stable or max rounds reached
+
+        Runs incrementally: after the first round only facts changed by the
+        previous repair pass are re-critiqued (see ReflectionEngine).
         """
         working: List[Dict[str, Any]] = [self._coerce_fact(f) for f in facts]
-        history: List[Dict[str, Any]] = []
-        aggregate_error_counts: Dict[str, int] = defaultdict(int)
-        rounds_executed = 0
-
-        for idx in range(max_rounds):
-            rounds_executed += 1
-            critiques = self._critique_facts(working)
-            repaired = self._repair_facts(working, critiques)
-            deduped = self._dedupe_facts(repaired)
-            round_error_report = self._summarize_error_types(critiques)
-            for error_type, count in round_error_report.items():
-                aggregate_error_counts[error_type] += count
-
-            history.append(
-                {
-                    "round": idx + 1,
-                    "input_count": len(working),
-                    "issues_found": sum(1 for c in critiques if c.get("issues")),
-                    "error_report": round_error_report,
-                    "output_count": len(deduped),
-                }
-            )
-
-            if self._facts_signature(deduped) == self._facts_signature(working):
-                working = deduped
-                break
-            working = deduped
+        engine = ReflectionEngine(self._critique_fact, self._repair_fact, self._fact_signature)
+        outcome = engine.run(working, max_rounds=max_rounds)
+        working = outcome.facts
 
         # Phase 3.5: Symbolic Logic Validation (FinReflect-Chain)
-        working = self._validate_with_symbolic_logic(working)
+        working = self._validate_with_symbolic_logic(working, calculation_rules)
         symbolic_report = self._generate_symbolic_report(working)
 
         summary = {
             "enabled": True,
             "max_rounds": max_rounds,
-            "rounds_executed": rounds_executed,
+            "rounds_executed": outcome.rounds_executed,
             "input_count": len(facts),
             "output_count": len(working),
-            "history": history,
-            "error_report": dict(sorted(aggregate_error_counts.items())),
-            "error_types_detected": sorted(aggregate_error_counts.keys()),
+            "history": outcome.history,
+            "error_report": outcome.error_counts,
+            "error_types_detected": sorted(outcome.error_counts.keys()),
             "symbolic_report": symbolic_report,
         }
         return working, summary
 
     def _coerce_fact(self, fact: Any) -> Dict[str, Any]:
+        # Dict facts are shared, not copied: repairs are copy-on-write.
         if isinstance(fact, dict):
-            return deepcopy(fact)
+            return fact
         if isinstance(fact, str):
             cleaned = fact.strip()
             return {"statement": cleaned, "raw_fact": fact, "validation_status": "coerced_from_str"}
         return {"raw_fact": str(fact), "validation_status": "coerced_from_unknown"}
 
     def _critique_facts(self, facts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        critiques: List[Dict[str, Any]] = []
-        for fact in facts:
-            issues: List[str] = []
-            if not any(fact.get(k) for k in ("statement", "metric", "value", "entity", "relation", "head_node")):
-                issues.append("missing_semantic_content")
-            value = fact.get("value")
-            if isinstance(value, str):
-                parsed = self._parse_numeric(value)
-                if parsed is None and any(ch.isdigit() for ch in value):
-                    issues.append("invalid_numeric_value")
-            if not fact.get("confidence"):
-                issues.append("missing_confidence")
-            if self._is_missing_triple_component(fact):
-                issues.append("missing_required_component")
-            error_types = self._classify_error_types(fact, issues)
-            critiques.append({"issues": sorted(set(issues)), "error_types": error_types})
-        return critiques
+        return [self._critique_fact(fact) for fact in facts]
+
+    def _critique_fact(self, fact: Dict[str, Any]) -> Dict[str, Any]:
+        issues: List[str] = []
+        if not any(fact.get(k) for k in ("statement", "metric", "value", "entity", "relation", "head_node")):
+            issues.append("missing_semantic_content")
+        value = fact.get("value")
+        if isinstance(value, str):
+            parsed = self._parse_numeric(value)
+            if parsed is None and any(ch.isdigit() for ch in value):
+                issues.append("invalid_numeric_value")
+        if not fact.get("confidence"):
+            issues.append("missing_confidence")
+        if self._is_missing_triple_component(fact):
+            issues.append("missing_required_component")
+        error_types = self._classify_error_types(fact, issues)
+        return {"issues": sorted(set(issues)), "error_types": error_types}
 
     def _repair_facts(self, facts: List[Dict[str, Any]], critiques: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        repaired: List[Dict[str, Any]] = []
-        for fact, critique in zip(facts, critiques):
-            fixed = deepcopy(fact)
-            issues = critique.get("issues", [])
-            error_types = critique.get("error_types", [])
-
-            if "invalid_numeric_value" in issues and isinstance(fixed.get("value"), str):
-                parsed = self._parse_numeric(fixed.get("value", ""))
-                if parsed is not None:
-                    fixed["value"] = parsed
-
-            if "missing_confidence" in issues:
-                fixed["confidence"] = "medium"
-
-            if "missing_semantic_content" in issues:
-                statement = self._build_statement(fixed)
-                if statement:
-                    fixed["statement"] = statement
-            if "relation_inversion" in error_types:
-                fixed = self._repair_relation_inversion(fixed)
-
-            if not fixed.get("validation_status"):
-                fixed["validation_status"] = "reflected"
-            if issues:
-                fixed["reflection_issues"] = issues
-            if error_types:
-                fixed["reflection_error_types"] = error_types
-
-            repaired.append(fixed)
-        return repaired
+        return [self._repair_fact(fact, critique) for fact, critique in zip(facts, critiques)]
+
+    def _repair_fact(self, fact: Dict[str, Any], critique: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy-on-write repair: returns `fact` itself when nothing needs fixing."""
+        fixed = fact
+        issues = critique.get("issues", [])
+        error_types = critique.get("error_types", [])
+
+        if "invalid_numeric_value" in issues and isinstance(fixed.get("value"), str):
+            parsed = self._parse_numeric(fixed.get("value", ""))
+            if parsed is not None:
+                fixed = self._cow_set(fixed, fact, "value", parsed)
+
+        if "missing_confidence" in issues:
+            fixed = self._cow_set(fixed, fact, "confidence", "medium")
+
+        if "missing_semantic_content" in issues:
+            statement = self._build_statement(fixed)
+            if statement:
+                fixed = self._cow_set(fixed, fact, "statement", statement)
+        if "relation_inversion" in error_types:
+            fixed = self._repair_relation_inversion(fixed)
+
+        if not fixed.get("validation_status"):
+            fixed = self._cow_set(fixed, fact, "validation_status", "reflected")
+        if issues:
+            fixed = self._cow_set(fixed, fact, "reflection_issues", issues)
+        if error_types:
+            fixed = self._cow_set(fixed, fact, "reflection_error_types", error_types)
+
+        return fixed
+
+    @staticmethod
+    def _cow_set(record: Dict[str, Any], original: Dict[str, Any], key: str, value: Any) -> Dict[str, Any]:
+        if record.get(key) == value and key in record:
+            return record
+        if record is original:
+            record = dict(original)
+        record[key] = value
+        return record
 
     def _dedupe_facts(self, facts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         seen = set()
@@ -376,7 +475,7 @@ class FinDistillAdapter(DistillEngine):
         if parsed is None:
             return fact
 
-        fixed = deepcopy(fact)
+        fixed = dict(fact)
         down_terms = ("decrease", "decline", "down", "drop", "reduce", "compressed")
         up_terms = ("increase", "rise", "up", "grow", "expanded", "improved")
         if any(term in relation for term in down_terms):
@@ -405,14 +504,13 @@ class FinDistillAdapter(DistillEngine):
             ]
         )
 
-    def _facts_signature(self, facts: List[Dict[str, Any]]) -> Tuple[str, ...]:
-        return tuple(sorted(self._fact_signature(fact) for fact in facts))
-
     def _enrich_with_source_anchors(self, facts: List[Dict[str, Any]], file_bytes: bytes) -> List[Dict[str, Any]]:
         """
         Pixel-Level Data Lineage Implementation:
         Uses PyMuPDF to locate extracted facts within the original PDF.
-        Enhanced with fuzzy multi-word search and best-match heuristic.
+        Words and boxes are read once per document into a PDFAnchorIndex and
+        every fact's search candidates are resolved against it. Large documents
+        are sharded by page across a process pool.
         """
         if not fitz or not file_bytes:
             return facts
@@ -423,70 +521,29 @@ class FinDistillAdapter(DistillEngine):
             print(f"[Lineage] Failed to open PDF for coordinate mapping: {e}")
             return facts
 
-        for fact in facts:
-            search_candidates = []
-            
-            # Priority 1: Exact statement (full context)
-            if fact.get("statement"):
-                search_candidates.append(fact["statement"])
-            
-            # Priority 2: Label + Value
-            label = fact.get("label") or fact.get("metric")
-            value = str(fact.get("value", ""))
-            if label and value:
-                search_candidates.append(f"{label} {value}")
-                search_candidates.append(label)
-                
-            # Priority 3: Just the metric/label
-            if label:
-                search_candidates.append(label)
-            
-            # Priority 4: Just the value (only if reasonably long)
-            if len(value) >= 3 and value not in ("None", "0", "0.0"):
-                search_candidates.append(value)
+        page_count = len(doc)
+        if page_count >= ANCHOR_PARALLEL_MIN_PAGES and ANCHOR_WORKERS > 1:
+            doc.close()
+            try:
+                anchors = anchor_facts_parallel(file_bytes, page_count, facts, workers=ANCHOR_WORKERS)
+            except Exception as e:
+                print(f"[Lineage] Parallel anchoring failed, falling back to single process: {e}")
+            else:
+                for fact, anchor in zip(facts, anchors):
+                    if anchor:
+                        fact["source_anchor"] = anchor
+                return facts
+            doc = fitz.open(stream=file_bytes, filetype="pdf")
 
-            best_anchor = None
-            
-            for page_idx in range(len(doc)):
-                page = doc[page_idx]
-                for term in search_candidates:
-                    if not term or len(term.strip()) < 2:
-                        continue
-                        
-                    # Precise coordinate search
-                    instances = page.search_for(term)
-                    if instances:
-                        # For now, we take the one that contains both if possible, 
-                        # or just the first occurrence of the strongest candidate.
-                        inst = instances[0]
-                        best_anchor = {
-                            "page": page_idx + 1,
-                            "box": [inst.x0, inst.y0, inst.x1, inst.y1],
-                            "match_term": term,
-                            "match_type": "precise"
-                        }
-                        break
-                if best_anchor:
-                    break
-            
-            # Fallback: Fuzzy word search if no exact match
-            if not best_anchor and label:
-                words = label.split()
-                if len(words) > 1:
-                    first_word_instances = page.search_for(words[0])
-                    if first_word_instances:
-                        inst = first_word_instances[0]
-                        best_anchor = {
-                            "page": page_idx + 1,
-                            "box": [inst.x0, inst.y0, inst.x1, inst.y1],
-                            "match_term": words[0],
-                            "match_type": "partial"
-                        }
-            
-            if best_anchor:
-                fact["source_anchor"] = best_anchor
-        
-        doc.close()
+        try:
+            index = PDFAnchorIndex.from_document(doc)
+        finally:
+            doc.close()
+
+        for fact in facts:
+            anchor = index.resolve(fact)
+            if anchor:
+                fact["source_anchor"] = anchor
         return facts
 
     def _self_heal_ontology_links(self, facts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -564,47 +621,15 @@ class FinDistillAdapter(DistillEngine):
             "metrics_affected": dict(sorted(metrics_affected.items())),
         }
 
-    def _validate_with_symbolic_logic(self, facts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _validate_with_symbolic_logic(
+        self,
+        facts: List[Dict[str, Any]],
+        calculation_rules: Optional[Iterable[Sequence[Any]]] = None,
+    ) -> List[Dict[str, Any]]:
         """
         Pillar 1: Symbolic-Neural Hybrid Validation.
-        Checks facts against accounting identities and tags mismatches.
+        Checks facts against accounting identities (and XBRL .cal rules, given as
+        (parent, child, weight) arcs) per period/entity and tags mismatches.
         """
-        # Create a lookup for metrics in the current context
-        metric_map = {}
-        for f in facts:
-            metric = str(f.get("metric") or f.get("relation") or "").strip().lower()
-            val = f.get("value")
-            if metric and val is not None:
-                parsed = self._parse_numeric(val)
-                if parsed is not None:
-                    metric_map[metric] = parsed
-
-        validated_facts = deepcopy(facts)
-        for rule in self.ACCOUNTING_IDENTITIES:
-            target_metric = str(rule.target_metric).strip().lower()
-            component_metrics = [str(m).strip().lower() for m in rule.component_metrics]
-            target_val = metric_map.get(target_metric)
-            component_vals = [metric_map.get(m) for m in component_metrics]
-            
-            if target_val is not None and all(v is not None for v in component_vals):
-                # Perform arithmetic check
-                calculated = 0.0
-                if rule.operation == "sum":
-                    calculated = sum(component_vals)
-                elif rule.operation == "difference":
-                    calculated = component_vals[0] - sum(component_vals[1:])
-                else:
-                    continue
-                
-                # Check for discrepancy (> 1% tolerance)
-                discrepancy = abs(calculated - target_val)
-                if target_val != 0 and (discrepancy / abs(target_val)) > 0.01:
-                    # Tag all related facts
-                    for f in validated_facts:
-                        f_metric = str(f.get("metric") or f.get("relation") or "").strip().lower()
-                        if f_metric == target_metric or f_metric in component_metrics:
-                            f["tags"] = f.get("tags", []) + ["symbolic_mismatch"]
-                            f["confidence"] = "low"
-                            f["reflection_issues"] = f.get("reflection_issues", []) + [f"Symbolic mismatch: {rule.description}"]
-
-        return validated_facts
+        extra_rules = calculation_rules_to_identities(calculation_rules or [])
+        return self.symbolic_validator.validate(facts, self._parse_numeric, extra_rules)
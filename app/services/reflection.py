@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+CritiqueFn = Callable[[Dict[str, Any]], Dict[str, Any]]
+RepairFn = Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+SignatureFn = Callable[[Dict[str, Any]], str]
+
+_HASH_MASK = (1 << 64) - 1
+
+
+@dataclass
+class ReflectionOutcome:
+    facts: List[Dict[str, Any]]
+    history: List[Dict[str, Any]] = field(default_factory=list)
+    error_counts: Dict[str, int] = field(default_factory=dict)
+    rounds_executed: int = 0
+
+
+class ReflectionEngine:
+    """
+    Incremental critique -> repair -> dedupe loop over copy-on-write fact records.
+
+    Repair functions return the *same* dict when nothing changes and a shallow
+    copy otherwise, so record identity doubles as a change flag. Only facts whose
+    critique-relevant fields changed in the previous round are re-critiqued; the
+    others reuse their cached critique (repair is idempotent for an unchanged
+    critique). Convergence is tested with an order-independent rolling hash over
+    fact signatures that is updated only for changed or dropped records.
+    """
+
+    CRITIQUE_KEYS = (
+        "statement",
+        "metric",
+        "value",
+        "entity",
+        "relation",
+        "head_node",
+        "tail_node",
+        "confidence",
+    )
+
+    def __init__(self, critique: CritiqueFn, repair: RepairFn, signature: SignatureFn) -> None:
+        self.critique = critique
+        self.repair = repair
+        self.signature = signature
+
+    def run(self, facts: List[Dict[str, Any]], max_rounds: int = 2) -> ReflectionOutcome:
+        source_ids = {id(fact) for fact in facts}
+        working: List[Dict[str, Any]] = list(facts)
+        critiques: List[Optional[Dict[str, Any]]] = [None] * len(working)
+        dirty: List[bool] = [True] * len(working)
+        signatures: List[str] = [self.signature(fact) for fact in working]
+        hashes: List[int] = [self._hash(sig) for sig in signatures]
+        rolling = sum(hashes) & _HASH_MASK
+
+        history: List[Dict[str, Any]] = []
+        aggregate: Dict[str, int] = defaultdict(int)
+        rounds_executed = 0
+
+        for idx in range(max_rounds):
+            rounds_executed += 1
+            round_counts: Dict[str, int] = defaultdict(int)
+            issues_found = 0
+
+            next_working: List[Dict[str, Any]] = []
+            next_critiques: List[Optional[Dict[str, Any]]] = []
+            next_dirty: List[bool] = []
+            next_signatures: List[str] = []
+            next_hashes: List[int] = []
+            next_rolling = rolling
+            seen = set()
+
+            for pos, fact in enumerate(working):
+                critique = critiques[pos]
+                if dirty[pos] or critique is None:
+                    critique = self.critique(fact)
+                if critique.get("issues"):
+                    issues_found += 1
+                for error_type in critique.get("error_types", []):
+                    round_counts[error_type] += 1
+
+                fixed = self.repair(fact, critique) if dirty[pos] else fact
+                changed = fixed is not fact and self._critique_fields_changed(fact, fixed)
+
+                signature, sig_hash = signatures[pos], hashes[pos]
+                if changed:
+                    signature = self.signature(fixed)
+                    sig_hash = self._hash(signature)
+                    next_rolling += sig_hash - hashes[pos]
+
+                if signature in seen:
+                    next_rolling -= sig_hash
+                    continue
+                seen.add(signature)
+
+                next_working.append(fixed)
+                next_critiques.append(None if changed else critique)
+                next_dirty.append(changed)
+                next_signatures.append(signature)
+                next_hashes.append(sig_hash)
+
+            for error_type, count in round_counts.items():
+                aggregate[error_type] += count
+
+            history.append(
+                {
+                    "round": idx + 1,
+                    "input_count": len(working),
+                    "issues_found": issues_found,
+                    "error_report": dict(sorted(round_counts.items())),
+                    "output_count": len(next_working),
+                }
+            )
+
+            next_rolling &= _HASH_MASK
+            converged = next_rolling == rolling
+            working, critiques, dirty = next_working, next_critiques, next_dirty
+            signatures, hashes, rolling = next_signatures, next_hashes, next_rolling
+            if converged:
+                break
+
+        # Detach untouched records from the caller's input before handing them on.
+        owned = [dict(fact) if id(fact) in source_ids else fact for fact in working]
+        return ReflectionOutcome(
+            facts=owned,
+            history=history,
+            error_counts=dict(sorted(aggregate.items())),
+            rounds_executed=rounds_executed,
+        )
+
+    def _critique_fields_changed(self, before: Dict[str, Any], after: Dict[str, Any]) -> bool:
+        return any(before.get(key) != after.get(key) for key in self.CRITIQUE_KEYS)
+
+    @staticmethod
+    def _hash(signature: str) -> int:
+        return hash(signature) & _HASH_MASK
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+ParseFn = Callable[[Any], Any]
+
+
+@dataclass
+class SymbolicRule:
+    rule_id: str
+    target_metric: str
+    component_metrics: List[str]
+    operation: str  # "sum", "difference", "weighted_sum"
+    description: str
+    weights: Optional[List[float]] = None  # only for "weighted_sum"
+    tolerance: float = 0.01  # relative to |target|
+
+    def component_weights(self) -> Optional[List[float]]:
+        count = len(self.component_metrics)
+        if self.operation == "sum":
+            return [1.0] * count
+        if self.operation == "difference":
+            return [1.0] + [-1.0] * (count - 1) if count else []
+        if self.operation == "weighted_sum" and self.weights is not None and len(self.weights) == count:
+            return [float(w) for w in self.weights]
+        return None
+
+
+def metric_key(name: Any) -> str:
+    return str(name or "").strip().lower()
+
+
+def concept_key(concept: Any) -> str:
+    """'us-gaap:Revenues', 'us-gaap_Revenues' and 'Revenues' all map to 'revenues'."""
+    local = str(concept or "").strip().split(":")[-1]
+    if "_" in local:
+        local = local.split("_", 1)[1]
+    return local.lower()
+
+
+def calculation_rules_to_identities(calculation_rules: Iterable[Sequence[Any]]) -> List[SymbolicRule]:
+    """
+    Group XBRL .cal (parent, child, weight[, role]) arcs into one weighted-sum rule
+    per (role, parent). A parent->child arc repeated within a role counts once, and
+    a role that restates another role's summation adds no second rule.
+    """
+    children: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(dict)
+    for arc in calculation_rules:
+        parent, child, weight = arc[0], arc[1], arc[2]
+        role = str(arc[3]) if len(arc) > 3 and arc[3] else ""
+        children[(role, concept_key(parent))].setdefault(concept_key(child), float(weight))
+
+    rules: List[SymbolicRule] = []
+    seen = set()
+    for (role, parent), parts in children.items():
+        signature = (parent, tuple(sorted(parts.items())))
+        if signature in seen:
+            continue
+        seen.add(signature)
+        formula = " ".join(f"{'+' if w >= 0 else '-'} {abs(w):g}*{c}" for c, w in parts.items()).lstrip("+ ")
+        rules.append(
+            SymbolicRule(
+                rule_id=f"cal:{role}:{parent}" if role else f"cal:{parent}",
+                target_metric=parent,
+                component_metrics=list(parts),
+                operation="weighted_sum",
+                weights=list(parts.values()),
+                description=f"XBRL calculation: {parent} = {formula}",
+            )
+        )
+    return rules
+
+
+class SymbolicValidator:
+    """
+    Vectorized accounting-identity checks over a (metric x period x scope) table.
+
+    Facts are pivoted once into a float64 array (NaN = not reported). Every rule
+    becomes a row of a weight matrix over metrics, so all identities and XBRL
+    calculation rules are evaluated for every period/entity cell with a single
+    tensordot. Mismatching cells are mapped back to the fact indices that fed them.
+
+    A scope is the entity plus the fact's XBRL dimensions, so a segment fact
+    (e.g. Revenues for one product member) never overwrites the consolidated
+    value for the same concept and period.
+    """
+
+    def __init__(self, rules: Optional[Iterable[SymbolicRule]] = None) -> None:
+        self.rules: List[SymbolicRule] = []
+        for rule in rules or []:
+            self.register_identity(rule)
+
+    def register_identity(self, rule: SymbolicRule) -> None:
+        if rule.component_weights() is None:
+            raise ValueError(f"Unsupported symbolic rule operation for {rule.rule_id}: {rule.operation}")
+        self.rules = [r for r in self.rules if r.rule_id != rule.rule_id] + [rule]
+
+    def validate(
+        self,
+        facts: List[Dict[str, Any]],
+        parse_numeric: ParseFn,
+        extra_rules: Iterable[SymbolicRule] = (),
+    ) -> List[Dict[str, Any]]:
+        """Return facts with mismatching ones tagged (copied on write; others shared)."""
+        validated = list(facts)
+        rules = list(self.rules) + [r for r in extra_rules if r.component_weights() is not None]
+        if not facts or not rules:
+            return validated
+
+        rows: Dict[str, int] = {}
+        periods: Dict[str, int] = {}
+        entities: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], int] = {}
+        cell_values: Dict[Tuple[int, int, int], float] = {}
+        cell_facts: Dict[Tuple[int, int, int], List[int]] = defaultdict(list)
+
+        for idx, fact in enumerate(facts):
+            keys = self._fact_keys(fact)
+            if not keys:
+                continue
+            p = periods.setdefault(str(fact.get("period") or fact.get("date") or ""), len(periods))
+            e = entities.setdefault(self._scope_key(fact), len(entities))
+            value = fact.get("value")
+            parsed = parse_numeric(value) if value is not None else None
+            for key in keys:
+                cell = (rows.setdefault(key, len(rows)), p, e)
+                cell_facts[cell].append(idx)
+                if parsed is not None:
+                    cell_values[cell] = float(parsed)  # last reported value wins
+
+        active: List[Tuple[SymbolicRule, int, List[int], List[float]]] = []
+        for rule in rules:
+            names = [metric_key(rule.target_metric)] + [metric_key(m) for m in rule.component_metrics]
+            if all(name in rows for name in names):
+                active.append((rule, rows[names[0]], [rows[n] for n in names[1:]], rule.component_weights()))
+        if not active or not cell_values:
+            return validated
+
+        table = np.full((len(rows), len(periods), len(entities)), np.nan)
+        cells = np.array(list(cell_values.keys()), dtype=np.intp)
+        table[cells[:, 0], cells[:, 1], cells[:, 2]] = np.fromiter(cell_values.values(), dtype=np.float64)
+
+        weights = np.zeros((len(active), len(rows)))
+        for r, (_rule, _target, components, component_weights) in enumerate(active):
+            for row, weight in zip(components, component_weights):
+                weights[r, row] += weight
+        targets = np.array([target for _, target, _, _ in active], dtype=np.intp)
+        tolerance = np.array([rule.tolerance for rule, _, _, _ in active])[:, None, None]
+
+        present = ~np.isnan(table)
+        calculated = np.tensordot(weights, np.where(present, table, 0.0), axes=(1, 0))
+        required = (weights != 0).astype(np.float64)
+        complete = np.tensordot(required, present.astype(np.float64), axes=(1, 0)) == required.sum(axis=1)[:, None, None]
+        target_vals = table[targets]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            relative = np.abs(calculated - target_vals) / np.abs(target_vals)
+        mismatch = complete & present[targets] & (target_vals != 0) & (relative > tolerance)
+
+        copied = set()
+        tagged = set()
+        for r, p, e in np.argwhere(mismatch):
+            rule, target, components, _ = active[r]
+            for row in [target] + components:
+                for idx in cell_facts.get((row, p, e), []):
+                    if (idx, r) in tagged:
+                        continue
+                    tagged.add((idx, r))
+                    if idx not in copied:
+                        validated[idx] = dict(validated[idx])
+                        copied.add(idx)
+                    fact = validated[idx]
+                    fact["tags"] = fact.get("tags", []) + ["symbolic_mismatch"]
+                    fact["confidence"] = "low"
+                    fact["reflection_issues"] = fact.get("reflection_issues", []) + [f"Symbolic mismatch: {rule.description}"]
+
+        return validated
+
+    @staticmethod
+    def _scope_key(fact: Dict[str, Any]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+        entity = str(fact.get("entity") or fact.get("head_node") or "")
+        dimensions = fact.get("dimensions") or {}
+        return entity, tuple(sorted((str(k), str(v)) for k, v in dimensions.items()))
+
+    @staticmethod
+    def _fact_keys(fact: Dict[str, Any]) -> List[str]:
+        keys = []
+        metric = metric_key(fact.get("metric") or fact.get("relation"))
+        if metric:
+            keys.append(metric)
+        if fact.get("concept"):
+            concept = concept_key(fact["concept"])
+            if concept and concept != metric:
+                keys.append(concept)
+        return keys
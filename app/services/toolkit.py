@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from app.services.distill_engine import FinDistillAdapter
 from app.services.oracle import OracleEngine
 from app.services.agentic_brain import AgenticBrain
@@ -77,6 +77,28 @@ class PrecisoToolkit:
             "status": "success"
         }
 
+    async def distill_jsonl(self, file_bytes: bytes, filename: str, mime_type: str) -> Iterator[str]:
+        """
+        Preciso Distill as a JSONL training corpus, yielded line by line (newline-terminated)
+        so the API can stream it. Raises ValueError when the document produced no QA.
+        """
+        self.log_sovereign_event(
+            event_type="inference_request",
+            stage="distill_jsonl",
+            payload={
+                "filename": filename,
+                "mime_type": mime_type,
+                "source": "api_toolkit",
+                "bytes_len": len(file_bytes),
+            },
+        )
+        from vendor.findistill.services.exporter import exporter
+        from vendor.findistill.services.ingestion import ingestion_service
+
+        extracted = await ingestion_service.process_file(file_bytes, filename, mime_type, export=False)
+        lines = exporter.iter_jsonl(extracted)
+        return (line + "\n" for line in lines)
+
     def predict_impact(self, node_id: str, delta: float, causal_graph: List[Dict]) -> Dict[str, Any]:
         """Preciso Oracle: Causal impact simulation (What-if)."""
         self.log_sovereign_event(
@@ -0,0 +1,109 @@
+"""
+Microbenchmark for XBRL fact extraction.
+
+Usage:
+    python scripts/bench_xbrl_extract.py [instance.xml] [--repeat N]
+
+Without an instance path, a synthetic instance sized like a large 10-K
+(~60k facts across current/prior periods and segment contexts) is generated.
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vendor.findistill.services.xbrl_enhancements import LabelManager  # noqa: E402
+from vendor.findistill.services.xbrl_semantic_engine import (  # noqa: E402
+    ScaleProcessor,
+    UnitManager,
+    XBRLSemanticEngine,
+)
+
+CONCEPTS = [
+    "Revenues", "CostOfRevenue", "GrossProfit", "OperatingIncomeLoss", "NetIncomeLoss",
+    "Assets", "Liabilities", "StockholdersEquity", "CommonStockSharesOutstanding",
+    "EffectiveIncomeTaxRate", "GrossProfitMargin", "CashAndCashEquivalentsAtCarryingValue",
+]
+
+
+def synthetic_instance(concepts: int = 4000, segments: int = 8, seed: int = 7) -> bytes:
+    rnd = random.Random(seed)
+    out = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance" xmlns:us-gaap="http://fasb.org/us-gaap/2023"'
+        ' xmlns:dei="http://xbrl.sec.gov/dei/2023" xmlns:xbrldi="http://xbrl.org/2006/xbrldi">',
+        '<dei:EntityRegistrantName contextRef="cy">Benchmark Industries Inc</dei:EntityRegistrantName>',
+        '<dei:DocumentFiscalYearFocus contextRef="cy">2024</dei:DocumentFiscalYearFocus>',
+    ]
+    contexts = []
+    for ctx_id, date in (("cy", "2024-12-31"), ("py", "2023-12-31")):
+        for seg in range(segments + 1):
+            cid = ctx_id if seg == 0 else f"{ctx_id}_s{seg}"
+            member = "" if seg == 0 else (
+                '<xbrli:segment><xbrldi:explicitMember dimension="us-gaap:StatementBusinessSegmentsAxis">'
+                f'us-gaap:Segment{seg}Member</xbrldi:explicitMember></xbrli:segment>'
+            )
+            out.append(
+                f'<xbrli:context id="{cid}"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">0000000001'
+                f'</xbrli:identifier>{member}</xbrli:entity><xbrli:period><xbrli:instant>{date}</xbrli:instant>'
+                '</xbrli:period></xbrli:context>'
+            )
+            contexts.append(cid)
+    for idx in range(concepts):
+        name = CONCEPTS[idx % len(CONCEPTS)] + (str(idx) if idx >= len(CONCEPTS) else "")
+        unit = "shares" if "Shares" in name else ("pure" if "Rate" in name else "USD")
+        for cid in contexts:
+            if rnd.random() < 0.8:
+                value = rnd.choice([str(rnd.randint(10**5, 10**11)), f"-{rnd.randint(1, 10**8)}", f"{rnd.random():.4f}"])
+                decimals = rnd.choice(["-6", "-3", "INF", "4"])
+                out.append(f'<us-gaap:{name} contextRef="{cid}" unitRef="{unit}" decimals="{decimals}">{value}</us-gaap:{name}>')
+    out.append("</xbrli:xbrl>")
+    return "\n".join(out).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("instance", nargs="?", help="XBRL instance document (defaults to a synthetic one)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    if args.instance:
+        with open(args.instance, "rb") as handle:
+            data = handle.read()
+    else:
+        data = synthetic_instance()
+
+    engine = XBRLSemanticEngine(file_path="")
+    label_mgr = LabelManager(None)
+    tree = ET.fromstring(data)
+    for elem in tree.iter():
+        if '}' in elem.tag: elem.tag = elem.tag.split('}', 1)[1]
+    contexts, context_dims = engine._parse_contexts_and_dims(tree)
+    facts = engine._extract_facts(tree, contexts, context_dims, label_mgr)
+    print(f"instance: {len(data) / 1e6:.1f} MB, {len(facts)} facts")
+
+    def report(name, func, items):
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"{name:<28} {best * 1000:9.1f} ms  {items / best:12,.0f} items/s")
+
+    raws = [(f.raw_value, f.decimals, f.unit) for f in facts]
+    pairs = [(elem.get("unitRef", "USD"), elem.tag) for elem in tree.iter() if elem.get("contextRef")]
+    report("apply_self_healing", lambda: [ScaleProcessor.apply_self_healing(*raw) for raw in raws], len(raws))
+    report("detect_unit_type", lambda: [UnitManager.detect_unit_type(*pair) for pair in pairs], len(pairs))
+    report("_extract_facts (DOM)", lambda: engine._extract_facts(tree, contexts, context_dims, label_mgr), len(facts))
+    report(
+        "iter_facts_streaming",
+        lambda: sum(1 for _ in engine.iter_facts_streaming(data, contexts, context_dims, label_mgr)),
+        len(facts),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import os
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services import anchoring
+from app.services.anchoring import PDFAnchorIndex, anchor_facts_parallel, normalize_token, shard_pages
+from app.services.distill_engine import FinDistillAdapter
+
+fitz = pytest.importorskip("fitz")
+
+
+def _build_pdf(pages):
+    doc = fitz.open()
+    for lines in pages:
+        page = doc.new_page()
+        for idx, text in enumerate(lines):
+            page.insert_text((72, 100 + idx * 20), text)
+    data = doc.write()
+    doc.close()
+    return data
+
+
+class PDFAnchorIndexTests(unittest.TestCase):
+    def test_normalize_token_strips_edge_punctuation(self):
+        self.assertEqual(normalize_token("Revenue:"), "revenue")
+        self.assertEqual(normalize_token("(1,250.5)"), "1250.5")
+        self.assertEqual(normalize_token("non-current"), "non-current")
+
+    def test_phrase_match_spans_punctuation_and_prefers_earliest_page(self):
+        pdf = _build_pdf([
+            ["Cover page"],
+            ["Operating Income: 42.0 Billion"],
+            ["Operating Income: 42.0 Billion (restated)"],
+        ])
+        doc = fitz.open(stream=pdf, filetype="pdf")
+        index = PDFAnchorIndex.from_document(doc)
+        doc.close()
+
+        anchor = index.resolve({"label": "Operating Income", "value": "42.0"})
+        self.assertEqual(anchor["page"], 2)
+        self.assertEqual(anchor["match_term"], "Operating Income 42.0")
+        self.assertEqual(anchor["match_type"], "precise")
+        self.assertLess(anchor["box"][0], anchor["box"][2])
+
+    def test_partial_fallback_reports_the_matching_page(self):
+        pdf = _build_pdf([["Segment overview"], ["Nothing here"], ["Nothing here either"]])
+        facts = [{"label": "Segment backlog", "value": "None"}]
+
+        enriched = FinDistillAdapter()._enrich_with_source_anchors(facts, pdf)
+
+        anchor = enriched[0]["source_anchor"]
+        self.assertEqual(anchor["match_type"], "partial")
+        self.assertEqual(anchor["page"], 1)
+
+    def test_unmatched_fact_has_no_anchor(self):
+        pdf = _build_pdf([["Revenue 100"]])
+        enriched = FinDistillAdapter()._enrich_with_source_anchors([{"label": "Goodwill", "value": "7"}], pdf)
+        self.assertNotIn("source_anchor", enriched[0])
+
+    def test_shard_pages_covers_every_page_once(self):
+        self.assertEqual(shard_pages(10, 3), [(0, 4), (4, 7), (7, 10)])
+        self.assertEqual(shard_pages(2, 4), [(0, 1), (1, 2)])
+
+    def test_process_pool_anchoring_matches_single_process(self):
+        pdf = _build_pdf([
+            ["Intro"],
+            ["Net Income 12.5"],
+            ["Total Assets 900", "Segment A revenue 40"],
+            ["Net Income 12.5 again"],
+        ])
+        facts = [
+            {"label": "Net Income", "value": "12.5"},
+            {"label": "Total Assets", "value": "900"},
+            {"label": "Segment backlog", "value": "None"},
+            {"label": "Missing", "value": "None"},
+        ]
+        doc = fitz.open(stream=pdf, filetype="pdf")
+        index = PDFAnchorIndex.from_document(doc)
+        doc.close()
+
+        parallel = anchor_facts_parallel(pdf, 4, facts, workers=2)
+
+        self.assertEqual(parallel, [index.resolve(f) for f in facts])
+        self.assertEqual([a["page"] if a else None for a in parallel], [2, 3, 3, None])
+
+    def test_broken_pool_is_replaced(self):
+        pdf = _build_pdf([["Intro"], ["Net Income 12.5"]])
+        facts = [{"label": "Net Income", "value": "12.5"}]
+        pool = anchoring._get_pool(2)
+        with self.assertRaises(BrokenProcessPool):
+            pool.submit(os._exit, 1).result()  # a worker dies, e.g. killed by the OOM killer
+
+        with self.assertRaises(BrokenProcessPool):
+            anchor_facts_parallel(pdf, 2, facts, workers=2)
+        self.assertEqual(anchor_facts_parallel(pdf, 2, facts, workers=2)[0]["page"], 2)
+        self.assertIsNot(anchoring._get_pool(2), pool)
+
+
+if __name__ == "__main__":
+    unittest.main()
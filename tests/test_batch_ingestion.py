@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+
+from tests.test_xbrl_streaming import INSTANCE
+from vendor.findistill.services.batch_ingestion import discover_filings, run_batch
+from vendor.findistill.services.checkpoint_store import CheckpointStore
+
+
+class BatchIngestionTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self._tmp.name, "filings")
+        self.out = os.path.join(self._tmp.name, "out")
+        os.makedirs(os.path.join(self.src, "2024Q4"))
+        for name in ("acme-20241231.xml", "2024Q4/beta-20241231.xbrl"):
+            with open(os.path.join(self.src, name), "wb") as f:
+                f.write(INSTANCE)
+        # Linkbases next to an instance are not filings.
+        with open(os.path.join(self.src, "acme-20241231_cal.xml"), "wb") as f:
+            f.write(b"<linkbase/>")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_discover_from_directory_and_manifest(self):
+        found = discover_filings(self.src)
+        self.assertEqual([os.path.basename(p) for p in found], ["beta-20241231.xbrl", "acme-20241231.xml"])
+
+        manifest = os.path.join(self.src, "manifest.jsonl")
+        with open(manifest, "w") as f:
+            f.write(json.dumps({"path": "acme-20241231.xml"}) + "\n# comment\n2024Q4/beta-20241231.xbrl\n")
+        self.assertEqual(discover_filings(manifest), [found[1], found[0]])
+
+    def test_batch_writes_outputs_and_resumes_from_checkpoint(self):
+        stats = run_batch(self.src, self.out, workers=1, formats=("jsonl", "parquet"))
+
+        self.assertEqual((stats.filings_done, stats.filings_failed), (2, 0))
+        self.assertEqual(stats.facts, 12)
+        with open(os.path.join(self.out, "dataset.jsonl")) as f:
+            self.assertEqual(sum(1 for _ in f), stats.qa_rows)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.out, "parquet"))), ["acme-20241231.parquet", "beta-20241231.parquet"])
+        self.assertGreater(stats.facts_per_sec, 0)
+
+        store = CheckpointStore(os.path.join(self.out, "checkpoints.sqlite3"))
+        self.addCleanup(store.close)
+        self.assertEqual(store.stats()["by_status"], {"success": 2})
+        record = store.get(discover_filings(self.src)[0])
+        self.assertGreater(record["duration"], 0)
+        self.assertLessEqual(record["started_at"], record["updated_at"])
+
+        resumed = run_batch(self.src, self.out, workers=1)
+        self.assertEqual((resumed.filings_skipped, resumed.filings_done), (2, 0))
+
+    def test_reruns_do_not_duplicate_qa_rows(self):
+        dataset = os.path.join(self.out, "dataset.jsonl")
+        first = run_batch(self.src, self.out, workers=1)
+        with open(dataset) as f:
+            expected = f.read()
+
+        # Rows of a filing that was written but never checkpointed (crash in between).
+        with open(dataset, "a") as f:
+            f.write('{"instruction": "orphan"}\n')
+        run_batch(self.src, self.out, workers=1)
+        with open(dataset) as f:
+            self.assertEqual(f.read(), expected)
+
+        again = run_batch(self.src, self.out, workers=1, resume=False)
+        self.assertEqual((again.filings_done, again.qa_rows), (2, first.qa_rows))
+        with open(dataset) as f:
+            self.assertEqual(sum(1 for _ in f), first.qa_rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
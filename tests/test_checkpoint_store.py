@@ -0,0 +1,111 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+from vendor.findistill.services.checkpoint_store import CheckpointStore
+from vendor.findistill.services.runtime_manager import RuntimeManager
+
+
+class CheckpointStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "checkpoints.sqlite3")
+
+    def _committed(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_marks_are_batched_and_queryable_before_commit(self):
+        store = CheckpointStore(self.path, batch_size=3, commit_seconds=3600)
+        self.addCleanup(store.close)
+        store.mark("a.xml", duration=1.5)
+        store.mark("b.xml", status="failed", error="parse error")
+        self.assertEqual((store.stats()["files"], store.stats()["pending"]), (0, 2))
+        self.assertTrue(store.is_done("a.xml"))
+        self.assertFalse(store.is_done("b.xml"))
+        self.assertTrue(store.is_done("b.xml", status=None))
+
+        store.mark("c.xml")
+        self.assertEqual(self._committed(), 3)
+        store.mark("b.xml", duration=0.5)  # retried
+        self.assertEqual(store.processed(), {"a.xml", "b.xml", "c.xml"})
+        record = store.get("b.xml")
+        self.assertEqual((record["status"], record["attempts"], record["error"], record["duration"]), ("success", 2, None, 0.5))
+        self.assertEqual(store.stats()["by_status"], {"success": 3})
+
+    def test_pending_marks_are_committed_by_timer_or_on_request(self):
+        store = CheckpointStore(self.path, batch_size=100, commit_seconds=0.05)
+        self.addCleanup(store.close)
+        store.mark("a.xml")
+        time.sleep(0.3)  # no further mark arrives
+        self.assertEqual(self._committed(), 1)
+
+        store.commit_seconds = 3600
+        store.mark("b.xml", commit=True)
+        self.assertEqual((self._committed(), store.stats()["pending"]), (2, 0))
+
+    def test_imports_legacy_json_checkpoint(self):
+        with open(os.path.join(self.tmp.name, "checkpoints.json"), "w") as f:
+            json.dump({"processed_files": ["old1.xml", "old2.xml"], "last_run": None}, f)
+        store = CheckpointStore(self.path)
+        self.addCleanup(store.close)
+        self.assertEqual(store.processed(), {"old1.xml", "old2.xml"})
+
+    def test_positions_and_reset(self):
+        conn = sqlite3.connect(self.path)  # a store created before positions were recorded
+        conn.execute("CREATE TABLE checkpoints (filename TEXT PRIMARY KEY, status TEXT NOT NULL, started_at REAL, "
+                     "duration REAL, error TEXT, attempts INTEGER NOT NULL DEFAULT 1, updated_at REAL NOT NULL)")
+        conn.execute("INSERT INTO checkpoints (filename, status, updated_at) VALUES ('old.xml', 'success', 0)")
+        conn.commit()
+        conn.close()
+
+        store = CheckpointStore(self.path)
+        self.addCleanup(store.close)
+        self.assertIsNone(store.last_position())
+        store.mark("a.xml", position=120)
+        store.mark("b.xml", position=80)
+        store.mark("c.xml", status="failed", position=500)
+        self.assertEqual((store.last_position(), store.last_position(status=None)), (120, 500))
+        store.reset()
+        self.assertEqual((store.processed(status=None), store.last_position()), (set(), None))
+
+    def test_concurrent_writers_share_one_file(self):
+        def work(worker):
+            store = CheckpointStore(self.path, batch_size=16)
+            for i in range(300):
+                store.mark(f"w{worker}-{i}.xml", duration=0.01)
+            store.close()
+
+        threads = [threading.Thread(target=work, args=(w,)) for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self._committed(), 1200)
+
+    def test_runtime_manager_api(self):
+        previous = RuntimeManager.CHECKPOINT_FILE
+        RuntimeManager.CHECKPOINT_FILE = self.path
+        try:
+            RuntimeManager.save_checkpoint("x.xml", duration=2.0)
+            RuntimeManager.save_checkpoint("y.xml", status="failed", error="boom")
+            checkpoint = RuntimeManager.load_checkpoint()
+            self.assertEqual(checkpoint["processed_files"], ["x.xml"])
+            self.assertIsNotNone(checkpoint["last_run"])
+            RuntimeManager.close_checkpoint()
+            self.assertEqual(self._committed(), 2)
+        finally:
+            RuntimeManager.close_checkpoint()
+            RuntimeManager.CHECKPOINT_FILE = previous
+
+
+if __name__ == "__main__":
+    unittest.main()
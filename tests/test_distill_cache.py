@@ -0,0 +1,112 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import mock
+
+from app.services.distill_cache import DistillCache, distill_cache_key
+from app.services.distill_engine import FinDistillAdapter
+from app.services.types import DistillResult
+
+
+class DistillCacheTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = DistillCache(os.path.join(self._tmp.name, "cache.sqlite3"))
+
+    def tearDown(self):
+        self.cache.close()
+        self._tmp.cleanup()
+
+    def test_rerun_of_identical_document_skips_pipeline(self):
+        from vendor.findistill.services.ingestion import ingestion_service
+
+        extracted = {
+            "title": "ACME 10-K",
+            "summary": "Annual report",
+            "facts": [{"entity": "ACME", "metric": "revenue", "value": 100, "period": "2024"}],
+        }
+        adapter = FinDistillAdapter(cache=self.cache)
+        with mock.patch.object(ingestion_service, "process_file", mock.AsyncMock(return_value=extracted)) as process:
+            first = asyncio.run(adapter.extract({"doc_id": "a", "filename": "acme.txt", "content": "Revenue 100"}))
+            second = asyncio.run(adapter.extract({"doc_id": "b", "filename": "acme.txt", "content": "Revenue 100"}))
+            other = asyncio.run(adapter.extract({"doc_id": "c", "filename": "acme.txt", "content": "Revenue 101"}))
+
+        self.assertEqual(process.await_count, 2)
+        self.assertFalse(first.metadata["cache"]["hit"])
+        self.assertTrue(second.metadata["cache"]["hit"])
+        self.assertFalse(other.metadata["cache"]["hit"])
+        self.assertEqual(second.metadata["doc_id"], "b")
+        self.assertEqual(second.facts, first.facts)
+        self.assertEqual(second.metadata["self_reflection"], first.metadata["self_reflection"])
+        self.assertEqual(self.cache.stats()["entries"], 2)
+
+    def test_degraded_results_are_not_cached(self):
+        from vendor.findistill.services.ingestion import ingestion_service
+
+        facts = [{"entity": "ACME", "metric": "revenue", "value": 100, "period": "2024"}]
+        adapter = FinDistillAdapter(cache=self.cache)
+        for mime_type, metadata in (
+            ("text/plain", {"degraded": "llm_failed"}),
+            ("text/plain", {"file_type": "pdf", "pdf_chunks": {"chunks": 3, "failed": 1}}),
+            ("image/png", {"file_type": "html_unstructured"}),  # OCR document read as text
+        ):
+            extracted = {"title": "ACME", "facts": facts, "metadata": metadata}
+            document = {"doc_id": "a", "filename": "acme", "mime_type": mime_type, "content": "Revenue 100"}
+            with mock.patch.object(ingestion_service, "process_file", mock.AsyncMock(return_value=extracted)) as process:
+                asyncio.run(adapter.extract(document))
+                asyncio.run(adapter.extract(document))
+            self.assertEqual(process.await_count, 2, metadata)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_key_depends_on_pipeline_version_and_config(self):
+        base = distill_cache_key(b"doc", "v1", {"mime_type": "application/pdf"})
+        self.assertEqual(base, distill_cache_key(b"doc", "v1", {"mime_type": "application/pdf"}))
+        self.assertNotEqual(base, distill_cache_key(b"doc", "v2", {"mime_type": "application/pdf"}))
+        self.assertNotEqual(base, distill_cache_key(b"doc", "v1", {"mime_type": "text/plain"}))
+
+    def test_hits_return_the_stored_types(self):
+        facts = [{"metric": "revenue", "value": Decimal("100.10"), "period": date(2024, 12, 31),
+                  "extracted_at": datetime(2025, 2, 1, 9, 30), "tags": ["[Healed]"]}]
+        self.cache.put("k", DistillResult(facts=facts, metadata={"ratio": 0.5}))
+
+        hit = self.cache.get("k")
+        self.assertEqual((hit.facts, hit.metadata), (facts, {"ratio": 0.5}))
+        self.assertIsInstance(hit.facts[0]["value"], Decimal)
+        self.cache.put("opaque", DistillResult(facts=[{"value": object()}]))
+        self.assertIsNone(self.cache.get("opaque"))  # not cached rather than stringified
+
+    def test_adapter_key_covers_model_and_pdf_switches(self):
+        from vendor.findistill.services import pdf_splitter, pdf_table_extractor
+        from vendor.findistill.services.ingestion import ingestion_service
+
+        adapter = FinDistillAdapter(cache=None)
+        base = adapter._cache_config("a.pdf", "application/pdf")
+        for target, name, value in (
+            (ingestion_service.gemini, "model_name", "gemini-other"),
+            (pdf_table_extractor, "PDF_LOCAL_TABLES", not pdf_table_extractor.PDF_LOCAL_TABLES),
+            (pdf_table_extractor, "PDF_LOCAL_MIN_CONFIDENCE", 0.1),
+            (pdf_splitter, "PDF_CHUNK_PAGES", 3),
+        ):
+            with mock.patch.object(target, name, value):
+                self.assertNotEqual(adapter._cache_config("a.pdf", "application/pdf"), base, name)
+
+    def test_lru_eviction_and_purge(self):
+        result = DistillResult(facts=[{"metric": "revenue", "value": "x" * 200}])
+        self.cache.put("k1", result)
+        self.cache.max_bytes = self.cache.stats()["total_bytes"] * 2 + 10
+        self.cache.put("k2", result)
+        self.assertIsNotNone(self.cache.get("k1"))  # k1 becomes most recently used
+        self.cache.put("k3", result)
+
+        self.assertEqual({e["key"] for e in self.cache.entries()}, {"k1", "k3"})
+        self.assertEqual(self.cache.purge("k1"), 1)
+        self.assertIsNone(self.cache.get("k1"))
+        self.assertEqual(self.cache.purge(), 1)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import numpy as np
+
+from vendor.findistill.services import embedder
+from vendor.findistill.services.embedder import EmbeddingService
+from vendor.findistill.services.embedding_cache import EmbeddingCache
+from vendor.findistill.services.rate_limiter import RateLimiter
+
+DIM = EmbeddingService.EMBEDDING_DIM
+
+
+def _vector(text):
+    return [float(len(text))] + [0.0] * (DIM - 1)
+
+
+class _FakeBatchEmbed(BaseHTTPRequestHandler):
+    """batchEmbedContents stand-in: vector[0] = len(text); records batch sizes and client ports."""
+
+    protocol_version = "HTTP/1.1"
+    batches = []
+    ports = set()
+
+    def do_POST(self):
+        cls = type(self)
+        requests = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["requests"]
+        cls.batches.append(len(requests))
+        cls.ports.add(self.client_address[1])
+        body = json.dumps({"embeddings": [{"values": _vector(r["content"]["parts"][0]["text"])} for r in requests]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class EmbeddingServiceTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeBatchEmbed)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        _FakeBatchEmbed.batches, _FakeBatchEmbed.ports = [], set()
+        self.tmp = tempfile.TemporaryDirectory()
+        limiter = mock.patch.object(embedder, "gemini_limiter", RateLimiter(rpm=0, tpm=0))
+        limiter.start()
+        self.addCleanup(limiter.stop)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def _service(self):
+        cache = EmbeddingCache("text-embedding-004", DIM, directory=self.tmp.name)
+        return EmbeddingService(api_base=f"http://127.0.0.1:{self.server.server_port}", cache=cache)
+
+    def _embed(self, service, texts, **kwargs):
+        async def run():
+            try:
+                return await service.generate_embeddings(texts, **kwargs)
+            finally:
+                await service.aclose()
+
+        return asyncio.run(run())
+
+    def test_batches_over_one_pooled_connection(self):
+        texts = [f"chunk {i}" for i in range(250)]
+        vectors = self._embed(self._service(), texts, batch_size=100, max_concurrency=1)
+
+        self.assertEqual(vectors.shape, (250, DIM))
+        self.assertEqual(vectors.dtype, np.float32)
+        self.assertEqual(vectors[:, 0].tolist(), [float(len(t)) for t in texts])
+        self.assertEqual(_FakeBatchEmbed.batches, [100, 100, 50])
+        self.assertEqual(len(_FakeBatchEmbed.ports), 1)
+
+    def test_duplicates_and_blank_texts_are_not_sent(self):
+        vectors = self._embed(self._service(), ["a", "", "bb", "a", "   "], batch_size=10)
+
+        self.assertEqual(_FakeBatchEmbed.batches, [2])
+        self.assertEqual(vectors[:, 0].tolist(), [1.0, 0.0, 2.0, 1.0, 0.0])
+
+    def test_unchanged_chunks_come_from_the_memmap_cache(self):
+        texts = [f"chunk {i}" for i in range(30)]
+        first = self._embed(self._service(), texts, batch_size=8)
+        _FakeBatchEmbed.batches = []
+
+        # A fresh service re-reads the cache files from disk.
+        service = self._service()
+        again = self._embed(service, texts + ["new chunk"], batch_size=8)
+
+        self.assertEqual(_FakeBatchEmbed.batches, [1])
+        np.testing.assert_array_equal(again[:30], first)
+        self.assertEqual(service.cache.stats()["entries"], 31)
+        self.assertEqual(os.path.getsize(service.cache.keys_path), 31 * 32)
+
+    def test_single_text_api_is_unchanged(self):
+        service = self._service()
+
+        async def run():
+            try:
+                return await service.generate_embedding("hello"), await service.generate_query_embedding("")
+            finally:
+                await service.aclose()
+
+        document, empty_query = asyncio.run(run())
+        self.assertEqual(document, _vector("hello"))
+        self.assertEqual(empty_query, [0.0] * DIM)
+
+
+class EmbeddingCacheTests(unittest.TestCase):
+    def test_torn_key_file_is_trimmed_and_growth_keeps_rows(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = EmbeddingCache("m", 4, directory=tmp)
+            rows = [(i.to_bytes(32, "big"), np.full(4, i, dtype=np.float32)) for i in range(1500)]
+            self.assertEqual(cache.put_many(rows), 1500)
+            cache.close()
+            with open(cache.keys_path, "ab") as f:
+                f.write(b"\x01" * 7)  # interrupted append
+
+            reopened = EmbeddingCache("m", 4, directory=tmp)
+            self.assertEqual(len(reopened), 1500)
+            self.assertEqual(os.path.getsize(reopened.keys_path), 1500 * 32)
+            self.assertEqual(reopened.put_many([(b"\xff" * 32, np.ones(4)), ((7).to_bytes(32, "big"), np.ones(4))]), 1)
+            got = reopened.get_many([(1234).to_bytes(32, "big"), b"\xff" * 32, b"\xee" * 32])
+            self.assertEqual(got[0].tolist(), [1234.0] * 4)
+            self.assertEqual(got[1].tolist(), [1.0] * 4)
+            self.assertIsNone(got[2])
+            reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
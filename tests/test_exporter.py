@@ -0,0 +1,232 @@
+import asyncio
+import io
+import json
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+from vendor.findistill.services.exporter import (
+    DataExporter,
+    clean_numeric,
+    fact_schema,
+    period_end_key,
+    resolve_period_end_keys,
+)
+from vendor.findistill.services.xbrl_semantic_engine import SemanticFact, XBRLSemanticEngine
+
+QA = [
+    {"question": "Q1", "response": "Revenue grew \"12%\"\nYoY.", "type": "financial_analysis"},
+    {"question": "Q2", "response": "Oil shock scenario.", "type": "scenario_simulation"},
+    {"question": "Q3", "response": "No type given."},
+]
+
+
+class JSONLStreamingTests(unittest.TestCase):
+    def test_engine_iter_jsonl_matches_generated_lines(self):
+        engine = XBRLSemanticEngine(company_name="Acme \"Café\" Corp", fiscal_year="2024", file_path="")
+        lines = list(engine.iter_jsonl(QA))
+
+        self.assertEqual(lines, engine._generate_jsonl(QA))
+        self.assertEqual(
+            json.loads(lines[0]),
+            {
+                "instruction": "Analyze the YoY trend of Acme \"Café\" Corp - financial_analysis.",
+                "input": "Acme \"Café\" Corp 2024 Financial Data",
+                "output": QA[0]["response"],
+                "metadata": {"company": "Acme \"Café\" Corp", "year": "2024"},
+            },
+        )
+        self.assertIn("- financial.", json.loads(lines[2])["instruction"])
+
+    def test_engine_iter_jsonl_is_lazy(self):
+        engine = XBRLSemanticEngine(company_name="Acme", file_path="")
+        lines = engine.iter_jsonl(QA + [{"response": "매출 증가"}])
+
+        self.assertEqual(len([next(lines) for _ in QA]), 3)
+        with self.assertRaises(RuntimeError):
+            next(lines)
+
+    def test_write_jsonl_streams_the_same_corpus_as_to_jsonl(self):
+        exporter = DataExporter()
+        for data in ({"jsonl_data": ['{"a": 1}', '{"b": 2}']}, {"title": "10-K", "reasoning_qa": QA}):
+            sink = io.StringIO()
+            rows = exporter.write_jsonl(data, sink)
+
+            self.assertEqual(sink.getvalue(), exporter.to_jsonl(data) + "\n")
+            self.assertEqual(rows, len(sink.getvalue().splitlines()))
+
+    def test_engine_results_render_lines_from_their_context(self):
+        engine = XBRLSemanticEngine(company_name="Acme", fiscal_year="2024", file_path="")
+        data = {"reasoning_qa": QA, "jsonl_context": engine.jsonl_lines(QA).context()}
+
+        self.assertEqual(list(DataExporter().iter_jsonl(data)), engine._generate_jsonl(QA))
+        json.dumps(data)  # results stay plain JSON
+        with self.assertRaises(RuntimeError):
+            engine.jsonl_lines(QA + [{"response": "매출 증가"}])  # poison pill is still checked up front
+
+    def test_adapter_cot_is_the_jsonl_corpus(self):
+        from app.services.distill_engine import FinDistillAdapter
+        from vendor.findistill.services.ingestion import ingestion_service
+
+        engine = XBRLSemanticEngine(company_name="Acme", fiscal_year="2024", file_path="")
+        extracted = {"title": "Acme", "facts": [], "reasoning_qa": QA, "jsonl_context": engine.jsonl_lines(QA).context()}
+        with mock.patch.object(ingestion_service, "process_file", mock.AsyncMock(return_value=extracted)):
+            result = asyncio.run(FinDistillAdapter(cache=None).extract({"filename": "acme.txt", "content": "x"}))
+
+        self.assertEqual(result.cot_markdown, "\n".join(engine._generate_jsonl(QA)))
+
+    def test_jsonl_preview_counts_rows(self):
+        preview = DataExporter().jsonl_preview({"title": "10-K", "reasoning_qa": QA}, limit=2)
+
+        self.assertEqual(preview["rows"], 3)
+        self.assertEqual([json.loads(line)["instruction"] for line in preview["preview"]], ["Q1", "Q2"])
+
+    def test_empty_corpus_fails_before_streaming(self):
+        with self.assertRaises(ValueError):
+            DataExporter().iter_jsonl({"reasoning_qa": []})
+
+
+@unittest.skipUnless(pq, "pyarrow not installed")
+class ParquetExportTests(unittest.TestCase):
+    def test_facts_use_the_typed_schema(self):
+        facts = [
+            {"concept": "ifrs:Revenue", "label": "Revenue", "value": "1,234.5", "unit": "KRW", "period": "2024",
+             "confidence_score": 0.5, "tags": ["[Healed]"]},
+            SemanticFact("us-gaap:NetIncome", "Net income", Decimal("12.3456789"), "12.3456789", "USD", "2023", "c1", 2,
+                         tags=["[Projected]", "[Healed]"]),
+            {"metric": "Loss", "value": "(56)", "source_anchor": {"page": 3}},
+            {"label": "Outlook", "value": "stable"},
+        ]
+        data = pq.read_table(io.BytesIO(DataExporter().to_parquet({"title": "10-K", "facts": facts, "tables": [{}]})))
+
+        self.assertTrue(data.schema.equals(fact_schema()))
+        self.assertEqual(json.loads(data.schema.metadata[b"findistill"]), {"title": "10-K"})
+        rows = data.to_pylist()
+        self.assertEqual([r["value"] for r in rows], [Decimal("1234.5"), Decimal("12.345679"), Decimal("-56"), None])
+        self.assertEqual([r["concept"] for r in rows], ["ifrs:Revenue", "us-gaap:NetIncome", "Loss", "Outlook"])
+        self.assertEqual(rows[1]["tags"], ["[Projected]", "[Healed]"])
+        self.assertEqual((rows[0]["confidence"], rows[3]["raw_value"]), (0.5, "stable"))
+        self.assertEqual(json.loads(rows[2]["source_anchor"]), {"page": 3})
+
+    def test_fact_stream_is_written_in_row_groups(self):
+        facts = ({"concept": f"c{i % 7}", "value": i, "unit": "USD", "period": "2024"} for i in range(2500))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "facts.parquet")
+            self.assertEqual(DataExporter().write_facts_parquet(facts, path, row_group_size=1000), 2500)
+
+            meta = pq.read_metadata(path)
+            self.assertEqual([meta.row_group(i).num_rows for i in range(meta.num_row_groups)], [1000, 1000, 500])
+            table = pq.read_table(path)
+            self.assertEqual(table.column("value").to_pylist()[-1], Decimal(2499))
+            self.assertEqual(len(table.column("concept").combine_chunks().dictionary), 7)
+
+    def test_tables_without_facts_keep_one_row_per_table_row(self):
+        data = {"tables": [
+            {"name": "IS", "headers": ["Metric", "2024", "2024"], "rows": [["Revenue", 10, 12]]},
+            {"name": "BS", "headers": ["Metric", "2023"], "rows": [["Cash", "5"]]},
+        ]}
+        rows = pq.read_table(io.BytesIO(DataExporter().to_parquet(data))).to_pylist()
+
+        self.assertEqual(rows[0], {"Metric": "Revenue", "2024": "10", "2024_1": "12", "_source_table": "IS", "2023": None})
+        self.assertEqual((rows[1]["_source_table"], rows[1]["2023"]), ("BS", "5"))
+        self.assertEqual(pq.read_table(io.BytesIO(DataExporter().to_parquet({}))).to_pylist(), [{"info": "no data"}])
+
+
+class NumericCleaningTests(unittest.TestCase):
+    def test_clean_numeric_is_elementwise(self):
+        cells = np.array([["1,234.5", "(56)", "−7"], ["$12%", "N/A", "1.2.3"], ["-", "", "+3"]])
+        np.testing.assert_array_equal(clean_numeric(cells), [[1234.5, -56, -7], [12, np.nan, np.nan], [np.nan, np.nan, 3]])
+
+    def test_clean_numeric_never_raises_and_matches_float(self):
+        cells = np.array(["1234¹", "--5", "+-5", "1e3", "(-5)", "(+5)", "-.5", "٣", "1,2e-2", "5."])
+        np.testing.assert_array_equal(clean_numeric(cells), [np.nan, np.nan, np.nan, 1000, -5, 5, -0.5, np.nan, 0.12, 5])
+        self.assertEqual(clean_numeric(np.array([], dtype=str)).shape, (0,))
+
+    def test_period_end_key(self):
+        periods = ["2024", "FY2023", "2024Q3", "Q1 2022", "2023-01-01_2023-12-31", "n/a"]
+        self.assertEqual([period_end_key(p) for p in periods], [20241231, 20231231, 20240930, 20220331, 20231231, 0])
+        data = {"metadata": {"period_dates": {"CY": "2024-06-30"}, "fiscal_year": "2024"}}
+        self.assertEqual(resolve_period_end_keys(["CY", "PY", "PY_2022-06-30", "n/a"], data),
+                         {"CY": 20240630, "PY": 20231231, "PY_2022-06-30": 20220630, "n/a": 0})
+
+
+@unittest.skipUnless(h5py, "h5py not installed")
+class HDF5ExportTests(unittest.TestCase):
+    def test_filings_append_along_time_and_restate_periods(self):
+        first = {"title": "ACME 2023", "metadata": {"company": "ACME Corp"}, "facts": [
+            {"concept": "us-gaap:Revenue", "value": "90", "period": "2022"},
+            {"concept": "us-gaap:Revenue", "value": "100", "period": "2023", "unit": "USD"},
+            {"concept": "us-gaap:Revenue", "value": "1", "period": "unknown"},
+        ]}
+        second = {"title": "ACME 2024", "metadata": {"company": "ACME Corp"}, "facts": [
+            {"concept": "us-gaap:Revenue", "value": "(120)", "period": "2024"},
+            {"concept": "us-gaap:Revenue", "value": "101", "period": "2023"},
+            {"concept": "us-gaap:Assets", "value": "n/a", "period": "2024"},
+        ]}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "panel.h5")
+            exporter = DataExporter()
+            self.assertEqual(exporter.write_hdf5(first, path), 2)
+            self.assertEqual(exporter.write_hdf5(second, path), 3)
+
+            with h5py.File(path, "r") as f:
+                revenue = f["facts/ACME_Corp/us-gaap_Revenue"]
+                self.assertEqual(revenue.attrs["unit"], "USD")
+                self.assertEqual(revenue["time"][:].tolist(), [20221231, 20231231, 20241231])
+                self.assertEqual(revenue["value"][:].tolist(), [90.0, 101.0, -120.0])
+                self.assertEqual(revenue["source"].asstr()[:].tolist(), ["ACME 2023", "ACME 2024", "ACME 2024"])
+                self.assertEqual((revenue["value"].maxshape, revenue["value"].compression), ((None,), "gzip"))
+                self.assertTrue(np.isnan(f["facts/ACME_Corp/us-gaap_Assets/value"][0]))
+
+    def test_xbrl_context_periods_and_segments(self):
+        import asyncio
+
+        from tests.test_xbrl_streaming import INSTANCE
+        from vendor.findistill.services.ingestion import ingestion_service
+
+        result = asyncio.run(ingestion_service.process_file(INSTANCE, "acme-20241231.xml", "application/xml", export=False))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "panel.h5")
+            self.assertEqual(DataExporter().write_hdf5(result, path, company="ACME"), len(result["facts"]))
+
+            with h5py.File(path, "r") as f:
+                revenue = f["facts/ACME/Revenues"]
+                order = np.argsort(revenue["time"][:])
+                self.assertEqual(revenue["period"].asstr()[:][order].tolist(), ["PY", "CY"])
+                self.assertEqual(revenue["value"][:][order].tolist(), [1.0, 1.2])
+                segment = f["facts/ACME/Revenues__StatementBusinessSegments_Auto"]
+                self.assertEqual((segment.attrs["dimensions"], segment["value"][:].tolist()), ("StatementBusinessSegments=Auto", [0.4]))
+
+    def test_unparseable_values_do_not_abort_the_filing(self):
+        data = {"title": "T", "metadata": {"company": "ACME"}, "facts": [
+            {"concept": "Revenue", "value": "1234¹", "period": "2024"},
+            {"concept": "Cost", "value": "--5", "period": "2024"},
+        ]}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "panel.h5")
+            self.assertEqual(DataExporter().write_hdf5(data, path), 2)
+            with h5py.File(path, "r") as f:
+                self.assertTrue(np.isnan(f["facts/ACME/Revenue/value"][0]))
+
+    def test_to_hdf5_tables_are_cleaned_to_float64(self):
+        data = {"title": "T", "tables": [{"name": "IS 2024", "headers": ["Metric", "2024"], "rows": [["Revenue", "1,200"], ["EPS"]]}]}
+        with h5py.File(io.BytesIO(DataExporter().to_hdf5(data)), "r") as f:
+            values = f["tables/IS_2024/data"][:]
+        np.testing.assert_array_equal(values, [[np.nan, 1200.0], [np.nan, np.nan]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+from vendor.findistill.services import fact_sink
+from vendor.findistill.services.exporter import DataExporter
+from vendor.findistill.services.fact_sink import FactSink, ParquetFactBackend, SQLiteFactBackend
+from vendor.findistill.services.xbrl_semantic_engine import SemanticFact
+
+
+def _facts(n, start=0):
+    return [{"concept": f"c{i}", "label": "Revenue", "value": i, "unit": "USD", "period": "2024"} for i in range(start, start + n)]
+
+
+class _GatedBackend:
+    """Records batches; each write waits for `gate` and can fail a set number of times."""
+
+    def __init__(self, failures=0):
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.failures = failures
+
+    def write(self, rows):
+        self.gate.wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("backend down")
+        self.batches.append(len(rows))
+
+    def close(self):
+        pass
+
+
+class FactSinkTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.deadletter = os.path.join(self.tmp.name, "failed.jsonl")
+
+    def _sink(self, backend, **kwargs):
+        kwargs.setdefault("flush_seconds", 0.05)
+        sink = FactSink(backend, deadletter_path=self.deadletter, retry_base=0.01, **kwargs)
+        self.addCleanup(sink.close)
+        return sink
+
+    def test_batches_into_sqlite(self):
+        path = os.path.join(self.tmp.name, "facts.sqlite3")
+        sink = self._sink(SQLiteFactBackend(path), batch_size=1000, flush_seconds=10)
+        fact = SemanticFact("us-gaap:NetIncome", "Net income", Decimal("12.5"), "12.5", "USD", "2023", "c1", 2, tags=["[Healed]"])
+
+        self.assertEqual(sink.submit(_facts(2499) + [fact], {"company": "ACME", "file_name": "acme.xml"}), 2500)
+        self.assertTrue(sink.flush(timeout=5))
+
+        self.assertEqual(sink.stats()["batches"], 3)
+        conn = sqlite3.connect(path)
+        self.assertEqual(conn.execute("SELECT COUNT(*), MIN(company), MIN(source) FROM facts").fetchone(), (2500, "ACME", "acme.xml"))
+        self.assertEqual(
+            conn.execute("SELECT value, tags FROM facts WHERE concept = 'us-gaap:NetIncome'").fetchone(),
+            ("12.5", '["[Healed]"]'),
+        )
+        conn.close()
+
+    def test_full_queue_blocks_the_producer(self):
+        backend = _GatedBackend()
+        backend.gate.clear()
+        sink = self._sink(backend, batch_size=10, max_queue=20)
+        sink.submit(_facts(10))
+        # Wait until the writer holds the first batch, then fill the queue.
+        while sink.stats()["pending"] != 10 or sink._in_flight != 10:
+            time.sleep(0.01)
+        sink.submit(_facts(20, start=10))
+
+        done = threading.Event()
+        threading.Thread(target=lambda: (sink.submit(_facts(5, start=30)), done.set()), daemon=True).start()
+        self.assertFalse(done.wait(0.2))
+        self.assertGreaterEqual(sink.stats()["blocked"], 1)
+
+        backend.gate.set()
+        self.assertTrue(done.wait(5))
+        self.assertTrue(sink.flush(timeout=5))
+        self.assertEqual(sum(backend.batches), 35)
+
+    def test_failed_batches_are_retried_then_dead_lettered(self):
+        flaky = _GatedBackend(failures=2)
+        sink = self._sink(flaky, max_retries=3)
+        sink.submit(_facts(3))
+        self.assertTrue(sink.flush(timeout=5))
+        self.assertEqual((flaky.batches, sink.stats()["retries"]), ([3], 2))
+
+        broken = _GatedBackend(failures=100)
+        sink = self._sink(broken, max_retries=1)
+        sink.submit(_facts(4), {"company": "ACME"})
+        self.assertTrue(sink.flush(timeout=5))
+        with open(self.deadletter) as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 4)
+        self.assertEqual((lines[0]["error"], lines[0]["fact"]["company"]), ("backend down", "ACME"))
+        self.assertEqual(sink.stats()["failed"], 4)
+
+    @unittest.skipUnless(pq, "pyarrow not installed")
+    def test_parquet_backend_writes_one_part_per_document(self):
+        directory = os.path.join(self.tmp.name, "parquet")
+        sink = self._sink(ParquetFactBackend(directory))
+        sink.submit(_facts(3), {"company": "ACME"})
+        sink.submit(_facts(2), {"company": "Globex"})
+        self.assertTrue(sink.flush(timeout=5))
+
+        parts = sorted(os.listdir(directory))
+        self.assertEqual(len(parts), 2)
+        rows = sorted(pq.read_table(os.path.join(directory, p)).num_rows for p in parts)
+        self.assertEqual(rows, [2, 3])
+
+    def test_export_facts_only_enqueues(self):
+        backend = _GatedBackend()
+        backend.gate.clear()
+        sink = self._sink(backend, batch_size=2)
+        with mock.patch.object(fact_sink, "_sink", sink):
+            started = time.monotonic()
+            queued = asyncio.run(DataExporter().export_facts_async(_facts(5), {"company": "ACME"}))
+            self.assertEqual(queued, 5)
+            self.assertLess(time.monotonic() - started, 0.5)
+            self.assertEqual(backend.batches, [])
+
+            backend.gate.set()
+            self.assertTrue(sink.flush(timeout=5))
+            self.assertEqual(backend.batches, [2, 2, 1])
+
+    def test_unavailable_backend_disables_export(self):
+        with mock.patch.object(fact_sink, "_sink", None), mock.patch.object(fact_sink, "_sink_disabled", False), \
+                mock.patch.object(fact_sink, "backend_from_env", side_effect=ValueError("no credentials")):
+            self.assertEqual(DataExporter().export_facts(_facts(2)), 0)
+            self.assertIsNone(fact_sink.get_fact_sink())
+
+
+if __name__ == "__main__":
+    unittest.main()
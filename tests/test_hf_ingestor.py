@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    from vendor.findistill.services import hf_ingestor
+    from vendor.findistill.services.hf_ingestor import CursorStore, HuggingFaceIngestor
+except ImportError:  # datasets / apscheduler / supabase not installed
+    hf_ingestor = None
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "hf_dataset")
+
+
+class _FakeSupabase:
+    """Records upserted batches; fails while `failing` is set."""
+
+    def __init__(self):
+        self.batches = []
+        self.failing = False
+
+    def table(self, name):
+        return self
+
+    def upsert(self, rows):
+        self._rows = rows
+        return self
+
+    def execute(self):
+        if self.failing:
+            raise ConnectionError("supabase down")
+        self.batches.append(list(self._rows))
+
+
+class _SlowIngestion:
+    """process_file stand-in that tracks how many calls run at once."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    async def process_file(self, content, filename, mime_type):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return {"summary": content.decode()[:20], "facts": []}
+
+
+@unittest.skipUnless(hf_ingestor, "datasets/apscheduler/supabase not installed")
+class HuggingFaceIngestorTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.data_dir = os.path.join(self.tmp.name, "dataset")
+        shutil.copytree(FIXTURE, self.data_dir)
+        self.cursor_path = os.path.join(self.tmp.name, "cursors.json")
+
+    def _ingestor(self, batch_size=3):
+        ingestor = HuggingFaceIngestor()
+        ingestor.datasets = [self.data_dir]
+        ingestor.cursors = CursorStore(self.cursor_path)
+        ingestor.supabase = _FakeSupabase()
+        ingestor.ingestion = None
+        ingestor.batch_size = batch_size
+        return ingestor
+
+    def _append(self, *texts):
+        with open(os.path.join(self.data_dir, "train.jsonl"), "a") as f:
+            for text in texts:
+                f.write(json.dumps({"text": text, "label": 1}) + "\n")
+
+    @staticmethod
+    def _texts(batches):
+        return [row["raw_data"].get("sentence") or row["raw_data"].get("text") for batch in batches for row in batch]
+
+    def test_polls_only_new_rows(self):
+        ingestor = self._ingestor()
+        asyncio.run(ingestor._poll_dataset())
+        self.assertEqual([len(b) for b in ingestor.supabase.batches], [3, 3, 2])
+        self.assertEqual(ingestor.supabase.batches[0][0]["dataset"], self.data_dir)
+
+        # Unchanged dataset: not even opened.
+        with mock.patch.object(ingestor, "_load_stream") as load:
+            asyncio.run(ingestor._poll_dataset())
+        load.assert_not_called()
+
+        self._append("Bank stocks rally.", "Yields fall.")
+        # A fresh process picks the cursor up from disk.
+        restarted = self._ingestor()
+        asyncio.run(restarted._poll_dataset())
+        self.assertEqual(self._texts(restarted.supabase.batches), ["Bank stocks rally.", "Yields fall."])
+        self.assertEqual(restarted.cursors.get(self.data_dir)["offset"], 10)
+
+    def test_failed_upsert_keeps_cursor_and_poll_cap(self):
+        ingestor = self._ingestor(batch_size=2)
+        ingestor.poll_max_rows = 4
+        asyncio.run(ingestor._poll_dataset())
+        self.assertEqual(len(self._texts(ingestor.supabase.batches)), 4)
+        self.assertFalse(ingestor.cursors.get(self.data_dir)["exhausted"])
+
+        ingestor.supabase.failing = True
+        asyncio.run(ingestor._poll_dataset())
+        self.assertEqual(ingestor.cursors.get(self.data_dir)["offset"], 4)
+
+        ingestor.supabase.failing = False
+        ingestor.poll_max_rows = 100
+        asyncio.run(ingestor._poll_dataset())
+        with open(os.path.join(FIXTURE, "train.jsonl")) as f:
+            expected = [json.loads(line) for line in f]
+        self.assertEqual(self._texts(ingestor.supabase.batches), [r.get("sentence") or r.get("text") for r in expected])
+
+    def test_transforms_run_concurrently_within_bound(self):
+        ingestor = self._ingestor(batch_size=8)
+        ingestor.ingestion = _SlowIngestion()
+        ingestor.transform_concurrency = 2
+        asyncio.run(ingestor._poll_dataset())
+
+        self.assertEqual(ingestor.ingestion.peak, 2)
+        rows = ingestor.supabase.batches[0]
+        self.assertEqual(rows[0]["content_summary"], "Operating profit ros")  # long text went through the engine
+        self.assertEqual(rows[2]["content_summary"], "Shares were flat.")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from vendor.findistill.services.exporter import DataExporter
+from vendor.findistill.services.ixbrl_parser import IXBRLParser
+from vendor.findistill.services.xbrl_semantic_engine import XBRLSemanticEngine
+
+DOCUMENT = """<?xml version="1.0" encoding="utf-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:ix="http://www.xbrl.org/2013/inlineXBRL"
+      xmlns:xbrli="http://www.xbrl.org/2003/instance">
+<head><title>10-K</title></head>
+<body>
+  <p>Revenue was <ix:nonFraction name="us-gaap:Revenues" contextRef="c_cy" unitRef="usd" decimals="-6" scale="6" format="ixt:num-dot-decimal">1,200</ix:nonFraction> million.</p>
+  <div style="display:none"><ix:header>
+    <ix:hidden>
+      <ix:nonNumeric name="dei:DocumentFiscalYearFocus" contextRef="c_cy">2024</ix:nonNumeric>
+    </ix:hidden>
+    <ix:resources>
+      <xbrli:context id="c_cy"><xbrli:entity><xbrli:identifier scheme="x">1</xbrli:identifier></xbrli:entity>
+        <xbrli:period><xbrli:instant>2024-12-31</xbrli:instant></xbrli:period></xbrli:context>
+      <xbrli:context id="c_py"><xbrli:entity><xbrli:identifier scheme="x">1</xbrli:identifier></xbrli:entity>
+        <xbrli:period><xbrli:instant>2023-12-31</xbrli:instant></xbrli:period></xbrli:context>
+      <xbrli:unit id="usd"><xbrli:measure>iso4217:USD</xbrli:measure></xbrli:unit>
+      <xbrli:unit id="shares"><xbrli:measure>xbrli:shares</xbrli:measure></xbrli:unit>
+      <xbrli:unit id="pure"><xbrli:measure>xbrli:pure</xbrli:measure></xbrli:unit>
+    </ix:resources>
+  </ix:header></div>
+  <ix:nonNumeric name="dei:EntityRegistrantName" contextRef="c_cy">Acme <b>Café</b> Corp</ix:nonNumeric>
+  <table>
+    <tr><td><ix:nonFraction name="us-gaap:Revenues" contextRef="c_py" unitRef="usd" decimals="-6" scale="6">1,000</ix:nonFraction></td></tr>
+    <tr><td><ix:nonFraction name="us-gaap:NetIncomeLoss" contextRef="c_cy" unitRef="usd" decimals="-6" scale="6" sign="-">(9<span>0</span>)</ix:nonFraction>
+    <tr><td><ix:nonFraction name="us-gaap:SharesOutstanding" contextRef="c_cy" unitRef="shares" decimals="0">5,000</ix:nonFraction>
+    <tr><td><ix:nonFraction name="us-gaap:EffectiveIncomeTaxRate" contextRef="c_cy" unitRef="pure" decimals="3">0.21</ix:nonFraction></td></tr>
+    <tr><td><ix:nonFraction name="us-gaap:Orphan" contextRef="c_missing" unitRef="usd">12</ix:nonFraction></td></tr>
+  </table>
+  <ix:nonNumeric name="us-gaap:PoliciesTextBlock" contextRef="c_cy"><p>Policies
+    <ix:nonFraction name="us-gaap:Goodwill" contextRef="c_cy" unitRef="usd" decimals="-6" scale="6">300</ix:nonFraction></p></ix:nonNumeric>
+</body>
+</html>
+""".encode("utf-8")
+
+
+def _snapshot(parser):
+    facts = parser.parse()
+    return [vars(f) for f in facts], parser.get_metadata(), parser.contexts, parser.units
+
+
+class IXBRLParserTests(unittest.TestCase):
+    def test_lxml_scan_matches_beautifulsoup(self):
+        fast = IXBRLParser(DOCUMENT)
+        soup = IXBRLParser(DOCUMENT, use_lxml=False)
+
+        self.assertEqual(_snapshot(fast), _snapshot(soup))
+        self.assertIsNotNone(fast._scan)
+        self.assertIsNone(fast._soup)
+
+    def test_extracts_facts_and_metadata(self):
+        parser = IXBRLParser(DOCUMENT)
+        facts = parser.parse()
+
+        self.assertEqual(
+            [(f.concept, f.period, f.unit) for f in facts],
+            [
+                ("Revenues", "2024-12-31", "currency"),
+                ("Revenues", "2023-12-31", "currency"),
+                ("NetIncomeLoss", "2024-12-31", "currency"),
+                ("SharesOutstanding", "2024-12-31", "shares"),
+                ("EffectiveIncomeTaxRate", "2024-12-31", "ratio"),
+                ("Goodwill", "2024-12-31", "currency"),
+            ],
+        )
+        self.assertEqual(facts[2].raw_value, "(90)")
+        self.assertEqual(parser.get_metadata(), {"company": "Acme Café Corp", "year": "2024"})
+
+    def test_declared_encoding_is_honoured(self):
+        latin1 = DOCUMENT.decode("utf-8").replace('encoding="utf-8"', 'encoding="iso-8859-1"').encode("iso-8859-1")
+        self.assertEqual(IXBRLParser(latin1).get_metadata()["company"], "Acme Café Corp")
+
+    def test_falls_back_to_beautifulsoup_when_lxml_rejects_input(self):
+        parser = IXBRLParser(b"")
+
+        self.assertEqual(parser.parse(), [])
+        self.assertTrue(parser._scan_failed)
+        self.assertEqual(parser.get_metadata(), {"company": "Unknown Entity", "year": "Unknown Year"})
+
+
+class IXBRLIngestionTests(unittest.TestCase):
+    def test_reasoning_qa_generated_once_on_normalized_facts(self):
+        from vendor.findistill.services.ingestion import FileIngestionService
+
+        original = XBRLSemanticEngine._generate_reasoning_qa
+        seen_values = []
+
+        def spy(engine, facts):
+            seen_values.append({(f.concept, f.period): f.value for f in facts})
+            return original(engine, facts)
+
+        with mock.patch.object(XBRLSemanticEngine, "_generate_reasoning_qa", autospec=True, side_effect=spy):
+            result = asyncio.run(FileIngestionService()._process_ixbrl(DOCUMENT, "acme-10k.htm"))
+
+        self.assertEqual(len(seen_values), 1)
+        revenue = next(f for f in result["facts"] if f["concept"] == "Revenues" and f["period"] == "CY")
+        self.assertEqual(str(seen_values[0][("Revenues", "CY")]), revenue["value"])
+        self.assertNotIn("jsonl_data", result)
+        self.assertEqual(DataExporter().jsonl_preview(result)["rows"], len(result["reasoning_qa"]))
+        self.assertTrue(any("Acme Café Corp" in qa["question"] for qa in result["reasoning_qa"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+from vendor.findistill.services.linkbase_cache import LinkbaseCache, linkbase_cache, parse_cal_rules
+from vendor.findistill.services.xbrl_semantic_engine import XBRLSemanticEngine
+
+CAL = b"""<?xml version="1.0"?>
+<link:linkbase xmlns:link="http://www.xbrl.org/2003/linkbase" xmlns:xlink="http://www.w3.org/1999/xlink">
+  <link:calculationLink xlink:type="extended">
+    <link:loc xlink:type="locator" xlink:href="acme.xsd#us-gaap_GrossProfit" xlink:label="gp"/>
+    <link:loc xlink:type="locator" xlink:href="acme.xsd#us-gaap_Revenues" xlink:label="rev"/>
+    <link:calculationArc xlink:type="arc" xlink:from="gp" xlink:to="rev" weight="1.0"/>
+  </link:calculationLink>
+</link:linkbase>"""
+
+
+class LinkbaseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = self._tmp.name
+        self.cal_path = os.path.join(self.dir, "acme-20241231_cal.xml")
+        with open(self.cal_path, "wb") as f:
+            f.write(CAL)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_engines_share_parsed_linkbases(self):
+        instance_path = os.path.join(self.dir, "acme-20241231.xml")
+        first = XBRLSemanticEngine(file_path=instance_path)
+        first.load_linkbases()
+        misses = linkbase_cache.stats()["misses"]
+
+        second = XBRLSemanticEngine(file_path=instance_path)
+        second.load_linkbases()
+
+        self.assertEqual(linkbase_cache.stats()["misses"], misses)
+        self.assertEqual(second.calculation_rules, [("us-gaap_GrossProfit", "us-gaap_Revenues", 1.0, "")])
+        second.calculation_rules.append(("x", "y", 1.0, ""))
+        self.assertEqual(len(first.calculation_rules), 1)
+
+    def test_calculation_arcs_carry_their_role(self):
+        role = b"http://acme.example/role/IncomeStatement"
+        cal = CAL.replace(b'<link:calculationLink xlink:type="extended">',
+                          b'<link:calculationLink xlink:type="extended" xlink:role="' + role + b'">')
+        self.assertEqual(parse_cal_rules(cal), (("us-gaap_GrossProfit", "us-gaap_Revenues", 1.0, role.decode()),))
+
+    def test_modified_file_is_reparsed(self):
+        cache = LinkbaseCache()
+        self.assertEqual(len(cache.get_file("cal", self.cal_path, parse_cal_rules)), 1)
+        with open(self.cal_path, "wb") as f:
+            f.write(CAL.replace(b"</link:calculationLink>", b'<link:calculationArc xlink:type="arc" xlink:from="rev" xlink:to="gp" weight="-1.0"/></link:calculationLink>'))
+        os.utime(self.cal_path, ns=(0, os.stat(self.cal_path).st_mtime_ns + 1_000_000))
+
+        self.assertEqual(len(cache.get_file("cal", self.cal_path, parse_cal_rules)), 2)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_item_cap_evicts_least_recently_used(self):
+        cache = LinkbaseCache(max_items=5)
+        cache.get_bytes("lab", b"a", lambda _: {"k1": "v", "k2": "v"})
+        cache.get_bytes("lab", b"b", lambda _: {"k1": "v", "k2": "v"})
+        cache.get_bytes("lab", b"a", lambda _: self.fail("expected a cache hit"))
+        cache.get_bytes("lab", b"c", lambda _: {"k1": "v", "k2": "v"})
+
+        self.assertEqual(cache.stats()["entries"], 2)
+        self.assertEqual(cache.get_bytes("lab", b"a", lambda _: {}), {"k1": "v", "k2": "v"})
+
+    def test_snapshot_round_trip(self):
+        snapshot = os.path.join(self.dir, "linkbases.pickle")
+        cache = LinkbaseCache(snapshot_path=snapshot)
+        rules = cache.get_file("cal", self.cal_path, parse_cal_rules)
+        cache.save_snapshot()
+
+        warm = LinkbaseCache(snapshot_path=snapshot)
+        self.assertEqual(warm.get_file("cal", self.cal_path, lambda _: self.fail("expected snapshot hit")), rules)
+
+
+if __name__ == "__main__":
+    unittest.main()
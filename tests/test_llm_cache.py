@@ -0,0 +1,126 @@
+import asyncio
+import base64
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from vendor.findistill.services import ingestion
+from vendor.findistill.services.llm_cache import LLMResponseCache, bypass_llm_cache, llm_cache_key
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class _FakeModel:
+    def __init__(self, text='{"title": "10-K"}'):
+        self.text = text
+        self.calls = 0
+
+    async def generate_content_async(self, contents, generation_config=None):
+        self.calls += 1
+        return _FakeResponse(self.text)
+
+
+class LLMResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = LLMResponseCache(path=os.path.join(self.tmp.name, "llm.sqlite3"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def _client(self, model):
+        client = ingestion.GeminiClient.__new__(ingestion.GeminiClient)
+        client.api_key, client.model_name, client.model = "test", "gemini-2.0-flash", model
+        return client
+
+    def test_key_covers_model_prompt_bytes_and_config(self):
+        base = llm_cache_key("m", ["prompt", {"mime_type": "application/pdf", "data": b"%PDF-1"}], {"a": 1})
+
+        self.assertEqual(base, llm_cache_key("m", ["prompt", {"data": b"%PDF-1", "mime_type": "application/pdf"}], {"a": 1}))
+        self.assertNotEqual(base, llm_cache_key("m2", ["prompt", {"mime_type": "application/pdf", "data": b"%PDF-1"}], {"a": 1}))
+        self.assertNotEqual(base, llm_cache_key("m", ["prompt", {"mime_type": "application/pdf", "data": b"%PDF-2"}], {"a": 1}))
+        self.assertNotEqual(base, llm_cache_key("m", ["prompt", {"mime_type": "application/pdf", "data": b"%PDF-1"}], {}))
+        self.assertNotEqual(llm_cache_key("m", ["ab", "c"]), llm_cache_key("m", ["a", "bc"]))
+
+    def test_generate_with_file_hits_cache_until_refreshed(self):
+        model = _FakeModel()
+        client = self._client(model)
+
+        async def extract(**kwargs):
+            return await client.generate_with_file(b"%PDF-1", "application/pdf", "Extract", "application/json", **kwargs)
+
+        with mock.patch.object(ingestion, "llm_cache", self.cache):
+            first = asyncio.run(extract())
+            second = asyncio.run(extract())
+            asyncio.run(extract(refresh=True))
+
+            async def bypassed():
+                with bypass_llm_cache():
+                    return await extract()
+
+            asyncio.run(bypassed())
+            with mock.patch.dict(os.environ, {"LLM_CACHE_BYPASS": "1"}):  # read per call, not at import
+                asyncio.run(extract())
+
+        self.assertEqual(first, second)
+        self.assertEqual(model.calls, 4)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(self.cache.stats()["entries"], 1)
+
+    def test_cache_io_runs_off_the_event_loop(self):
+        threads = []
+        get = self.cache.get
+
+        def recording_get(key):
+            threads.append(threading.current_thread())
+            return get(key)
+
+        async def call():
+            return "response"
+
+        with mock.patch.object(self.cache, "get", recording_get):
+            asyncio.run(self.cache.cached("m", ["prompt"], None, call))
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.main_thread())
+
+    def test_invalid_json_is_not_cached(self):
+        model = _FakeModel(text="not json")
+        client = self._client(model)
+        contents = [{"parts": [{"inline_data": {"mime_type": "image/png", "data": base64.b64encode(b"png").decode()}}]}]
+
+        with mock.patch.object(ingestion, "llm_cache", self.cache):
+            for _ in range(2):
+                asyncio.run(client.generate_content(contents, "application/json"))
+
+        self.assertEqual(model.calls, 2)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_ttl_expiry(self):
+        self.cache.ttl_seconds = 60
+        self.cache.put("k", "response")
+        self.assertEqual(self.cache.get("k"), "response")
+
+        with mock.patch("time.time", return_value=time.time() + 61):
+            self.assertIsNone(self.cache.get("k"))
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_evicts_least_recently_used_beyond_max_bytes(self):
+        self.cache.max_bytes = 25
+        self.cache.put("a", "x" * 10)
+        self.cache.put("b", "y" * 10)
+        self.cache.get("a")
+        self.cache.put("c", "z" * 10)
+
+        self.assertEqual({e["key"] for e in self.cache.entries()}, {"a", "c"})
+        self.assertEqual(self.cache.purge(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
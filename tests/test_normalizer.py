@@ -0,0 +1,40 @@
+import unittest
+
+from vendor.findistill.services.normalizer import FinancialNormalizer
+
+
+class FinancialNormalizerTests(unittest.TestCase):
+    def setUp(self):
+        self.normalizer = FinancialNormalizer()
+
+    def test_text_corrections_and_dates_in_one_pass(self):
+        text = self.normalizer._normalize_text("Reveneu and Net Incom as of 2024.1.5, Net Income 2023/12/31, 2024.1/5")
+        self.assertEqual(text, "Revenue and Net Income as of 2024-01-05, Net Income 2023-12-31, 2024.1/5")
+        # Corrections are whole-word: already-correct terms are left alone.
+        self.assertEqual(self.normalizer._normalize_text("Net Income, Revenues"), "Net Income, Revenues")
+
+    def test_table_batch_matches_per_cell(self):
+        rows = [
+            ["Reveneu", "1,234", "(56)", "-7.5", None],
+            ["Margin", "12.5%", "$1.2M", "₩3억", "n/a"],
+            ["Period", "2024.1.1", "USD 10", "", "Financial"],
+        ]
+        table = self.normalizer._normalize_table({"headers": ["Metric", 2024, "Operatin Income"], "rows": rows})
+
+        self.assertEqual(table["headers"], ["Metric", "2024", "Operating Income"])
+        self.assertEqual(table["rows"], [[self.normalizer._normalize_cell(c) for c in row] for row in rows])
+        self.assertEqual(table["rows"][0], ["Revenue", 1234.0, -56.0, -7.5, ""])
+        self.assertEqual(table["rows"][1][1:3], [0.125, "$1.2M"])
+
+    def test_normalize_shares_unnormalized_keys(self):
+        data = {"title": "Reveneu", "jsonl_data": [{"x": 1}], "key_metrics": {"Reveneu": "1,200"}}
+        out = self.normalizer.normalize(data)
+
+        self.assertIs(out["jsonl_data"], data["jsonl_data"])
+        self.assertEqual((out["title"], out["key_metrics"]), ("Revenue", {"Revenue": 1200.0}))
+        self.assertEqual(data["title"], "Reveneu")
+        self.assertEqual(out["normalization"]["version"], "1.1")
+
+
+if __name__ == "__main__":
+    unittest.main()
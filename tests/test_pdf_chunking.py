@@ -0,0 +1,113 @@
+import asyncio
+import json
+import re
+import time
+import unittest
+from unittest import mock
+
+import fitz
+
+from vendor.findistill.services import ingestion
+from vendor.findistill.services.pdf_splitter import split_pdf
+from vendor.findistill.services.rate_limiter import RateLimiter
+
+NARRATIVE = "Management discussion. Our strategy focuses on customers and long-term value creation."
+
+
+def _table_text(page_no):
+    rows = [f"Revenue segment {i}   {1000 + page_no * 10 + i:,}   {900 + i:,}" for i in range(12)]
+    return f"Table page {page_no}\nConsolidated Statements (in millions)   2024   2023\n" + "\n".join(rows)
+
+
+def _pdf(pages):
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((36, 48), text, fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _page_texts(content):
+    with fitz.open(stream=content, filetype="pdf") as doc:
+        return [page.get_text("text") for page in doc]
+
+
+# Cover, then alternating narrative / table pages: 1 cover + 16 tables + 15 narrative.
+PAGES = ["Acme Corp Annual Report 2024"] + [
+    _table_text(i) if i % 2 else NARRATIVE for i in range(1, 32)
+]
+
+
+class _ChunkModel:
+    """Fake Gemini: one table per table page in the chunk, after a fixed latency."""
+
+    def __init__(self, latency=0.2):
+        self.latency = latency
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def generate_content_async(self, contents, generation_config=None):
+        self.calls += 1
+        first_call = self.calls == 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(self.latency)
+        self.active -= 1
+        pdf = next(part["data"] for part in contents if isinstance(part, dict))
+        tables = [
+            {"name": f"Page {n}", "headers": ["Metric", "2024", "2023"], "rows": [["Revenue", str(1000 + int(n) * 10), "900"]]}
+            for text in _page_texts(pdf)
+            for n in re.findall(r"Table page (\d+)", text)
+        ]
+        result = {"tables": tables, "key_metrics": {"Revenue": "1.0B"}}
+        if first_call:
+            result["title"] = "Acme Corp Annual Report 2024"
+        return mock.Mock(text=json.dumps(result))
+
+
+class PDFSplitterTests(unittest.TestCase):
+    def test_skips_narrative_pages_and_windows_the_rest(self):
+        chunks = split_pdf(_pdf(PAGES), pages_per_chunk=5)
+
+        kept = [p for c in chunks for p in c.pages]
+        self.assertEqual(kept, [0] + list(range(1, 32, 2)))
+        self.assertEqual([len(c.pages) for c in chunks], [5, 5, 5, 2])
+        self.assertEqual(chunks[1].label, "pages 10-18 of 32")
+        self.assertEqual(_page_texts(chunks[0].content)[1], _page_texts(_pdf(PAGES))[1])
+
+    def test_keeps_every_page_without_pre_pass_and_rejects_non_pdf(self):
+        chunks = split_pdf(_pdf(PAGES), pages_per_chunk=8, skip_narrative=False)
+
+        self.assertEqual([c.pages for c in chunks], [list(range(i, i + 8)) for i in range(0, 32, 8)])
+        self.assertEqual(split_pdf(b"not a pdf"), [])
+
+
+class ChunkedExtractionTests(unittest.TestCase):
+    def test_chunks_run_concurrently_and_merge_in_page_order(self):
+        service = ingestion.FileIngestionService()
+        model = _ChunkModel()
+        service.gemini.model = model
+        limiter = RateLimiter(rpm=0, tpm=0, max_concurrency=4)
+
+        with mock.patch.object(ingestion, "gemini_limiter", limiter), \
+                mock.patch.object(ingestion, "llm_cache", None), \
+                mock.patch.object(ingestion, "PDF_LOCAL_TABLES", False), \
+                mock.patch.object(ingestion, "split_pdf", lambda content, **kwargs: split_pdf(content, pages_per_chunk=2, **kwargs)):
+            started = time.perf_counter()
+            result = asyncio.run(service._process_with_gemini(_pdf(PAGES), "acme.pdf", "application/pdf"))
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual(model.calls, 9)
+        self.assertEqual(model.max_active, 4)
+        self.assertLess(elapsed, 9 * model.latency / 2)
+        self.assertEqual(result["title"], "Acme Corp Annual Report 2024")
+        self.assertEqual([t["name"] for t in result["tables"]], [f"Page {p}" for p in range(1, 32, 2)])
+        self.assertEqual([t["rows"][0][1] for t in result["tables"]], [str(1000 + p * 10) for p in range(1, 32, 2)])
+        self.assertEqual(result["metadata"]["pdf_chunks"], {"chunks": 9, "failed": 0, "pages_sent": 17, "total_pages": 32})
+        self.assertTrue(result["facts"])
+
+
+if __name__ == "__main__":
+    unittest.main()
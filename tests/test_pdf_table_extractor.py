@@ -0,0 +1,164 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import fitz
+
+from vendor.findistill.services import ingestion
+from vendor.findistill.services.pdf_table_extractor import extract_pdf_tables
+
+INCOME = [
+    ("Net revenues", "12,345", "11,020"),
+    ("Cost of revenues", "(7,100)", "(6,450)"),
+    "Operating expenses:",
+    ("Research and development", "1,200", "1,150"),
+    ("Restructuring", "-", "45"),
+    ("Diluted earnings per share", "2.45", "1.90"),
+]
+BALANCE = [
+    ("Cash and cash equivalents", "4,500", "3,900"),
+    ("Total assets", "52,100", "49,800"),
+]
+PROSE = "Our business strategy focuses on long-term growth and customer value in every market."
+
+
+def _right(page, x1, y, text):
+    page.insert_text((x1 - fitz.get_text_length(text, fontname="helv", fontsize=9), y), text, fontsize=9)
+
+
+def _statement(doc, title, rows):
+    """SEC-style statement: label column, '$' column, right-aligned year columns."""
+    page = doc.new_page()
+    page.insert_text((36, 60), title, fontsize=11)
+    page.insert_text((36, 80), "(in millions, except per share data)", fontsize=9)
+    _right(page, 420, 80, "2024")
+    _right(page, 500, 80, "2023")
+    y = 100
+    for row in rows:
+        if isinstance(row, str):
+            page.insert_text((36, y), row, fontsize=9)
+        else:
+            page.insert_text((36, y), row[0], fontsize=9)
+            page.insert_text((350, y), "$", fontsize=9)
+            _right(page, 420, y, row[1])
+            _right(page, 500, y, row[2])
+        y += 14
+    page.insert_text((36, y + 20), "See accompanying notes to the consolidated financial statements.", fontsize=8)
+
+
+def _mixed_page(doc):
+    """A confident statement, then a header-less schedule below it (rejected: no year columns)."""
+    _statement(doc, "Segment Results", [("Employees", "2024", "2019"), ("Stores", "1,210", "1,180")])
+    page = doc[-1]
+    page.insert_text((36, 190), "Supplemental schedule", fontsize=11)
+    for i, (label, a, b) in enumerate([("Leases", "310", "295"), ("Purchase obligations", "85", "90")]):
+        page.insert_text((36, 210 + 14 * i), label, fontsize=9)
+        _right(page, 420, 210 + 14 * i, a)
+        _right(page, 500, 210 + 14 * i, b)
+
+
+def _filing(scanned=False, mixed=False):
+    doc = fitz.open()
+    doc.new_page().insert_text((36, 100), "Acme Corp Annual Report 2024", fontsize=20)
+    prose = doc.new_page()
+    for i in range(20):
+        prose.insert_text((36, 60 + 14 * i), PROSE, fontsize=9)
+    _statement(doc, "Consolidated Statements of Operations", INCOME)
+    _statement(doc, "Consolidated Balance Sheets", BALANCE)
+    if scanned:
+        doc.new_page()  # no text layer
+    if mixed:
+        _mixed_page(doc)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class _CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content_async(self, contents, generation_config=None):
+        self.calls += 1
+        table = {"name": "Scanned note", "headers": ["Metric", "2024", "2023"], "rows": [["Goodwill", "800", "750"]]}
+        return mock.Mock(text=json.dumps({"title": "", "tables": [table]}))
+
+
+class PDFTableExtractorTests(unittest.TestCase):
+    def test_rebuilds_statement_tables_from_word_positions(self):
+        result = extract_pdf_tables(_filing())
+
+        self.assertEqual(result.title, "Acme Corp Annual Report 2024")
+        self.assertEqual(result.llm_pages, [])
+        income, balance = result.tables
+        self.assertEqual(income["name"], "Consolidated Statements of Operations")
+        self.assertEqual(income["headers"], ["Metric", "2024", "2023"])
+        self.assertEqual(
+            income["rows"],
+            [
+                ["Net revenues", "12,345", "11,020"],
+                ["Cost of revenues", "(7,100)", "(6,450)"],
+                ["Research and development", "1,200", "1,150"],
+                ["Restructuring", "", "45"],
+                ["Diluted earnings per share", "2.45", "1.90"],
+            ],
+        )
+        self.assertEqual((income["source_pages"], income["confidence"]), ([3, 3], 1.0))
+        self.assertEqual(balance["rows"][1], ["Total assets", "52,100", "49,800"])
+
+    def test_scanned_pages_are_left_for_the_llm(self):
+        self.assertEqual(extract_pdf_tables(_filing(scanned=True)).llm_pages, [4])
+        self.assertIsNone(extract_pdf_tables(b"not a pdf"))
+
+    def test_pages_with_any_rejected_table_are_left_for_the_llm(self):
+        result = extract_pdf_tables(_filing(mixed=True))
+
+        self.assertEqual(result.llm_pages, [4])
+        segment = result.tables[-1]
+        self.assertEqual(segment["name"], "Segment Results")
+        # Year-valued amounts after an ordinary label are data, not a header row.
+        self.assertEqual(segment["rows"], [["Employees", "2024", "2019"], ["Stores", "1,210", "1,180"]])
+
+
+class LocalFirstIngestionTests(unittest.TestCase):
+    def _process(self, content, model):
+        service = ingestion.FileIngestionService()
+        service.gemini.model = model
+        with mock.patch.object(ingestion, "llm_cache", None):
+            return asyncio.run(service._process_with_gemini(content, "acme.pdf", "application/pdf"))
+
+    def test_digital_pdf_skips_the_llm(self):
+        model = _CountingModel()
+        result = self._process(_filing(), model)
+
+        self.assertEqual(model.calls, 0)
+        self.assertEqual(result["metadata"]["processed_by"], "pymupdf-tables + xbrl-engine-v13.2")
+        self.assertEqual(result["title"], "Acme Corp Annual Report 2024")
+        concepts = {(f["concept"], f["period"]) for f in result["facts"]}
+        self.assertIn(("Netrevenues", "CY"), concepts)
+        self.assertIn(("Totalassets", "PY_2023"), concepts)
+
+    def test_only_scanned_pages_go_to_gemini(self):
+        model = _CountingModel()
+        result = self._process(_filing(scanned=True), model)
+
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(result["metadata"]["llm_pages"], [5])
+        self.assertEqual([t["name"] for t in result["tables"]], [
+            "Consolidated Statements of Operations", "Consolidated Balance Sheets", "Scanned note",
+        ])
+        self.assertEqual(result["title"], "Acme Corp Annual Report 2024")
+
+    def test_llm_pages_replace_their_local_tables(self):
+        model = _CountingModel()
+        result = self._process(_filing(mixed=True), model)
+
+        self.assertEqual((model.calls, result["metadata"]["llm_pages"]), (1, [5]))
+        self.assertEqual([t["name"] for t in result["tables"]], [
+            "Consolidated Statements of Operations", "Consolidated Balance Sheets", "Scanned note",
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
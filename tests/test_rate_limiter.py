@@ -0,0 +1,163 @@
+import asyncio
+import base64
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from vendor.findistill.services import embedder
+from vendor.findistill.services.embedder import EmbeddingService
+from vendor.findistill.services.pdf_splitter import fitz
+from vendor.findistill.services.rate_limiter import (
+    RateLimiter,
+    TokenBucket,
+    estimate_tokens,
+    retry_after_seconds,
+)
+
+
+VECTOR = [0.5, 0.25] * (EmbeddingService.EMBEDDING_DIM // 2)
+
+
+class _FakeGemini(BaseHTTPRequestHandler):
+    """Answers batchEmbedContents with 429 (Retry-After: 0) for the first `throttle` requests."""
+
+    throttle = 0
+    hits = 0
+    concurrent = 0
+    max_concurrent = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        cls = type(self)
+        requests = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))["requests"]
+        with cls.lock:
+            cls.hits += 1
+            hit = cls.hits
+            cls.concurrent += 1
+            cls.max_concurrent = max(cls.max_concurrent, cls.concurrent)
+        time.sleep(0.02)
+        with cls.lock:
+            cls.concurrent -= 1
+        if hit <= cls.throttle:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            body = b'{"error": {"status": "RESOURCE_EXHAUSTED"}}'
+        else:
+            self.send_response(200)
+            body = json.dumps({"embeddings": [{"values": VECTOR}] * len(requests)}).encode()
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class RateLimiterTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeGemini)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        _FakeGemini.hits = _FakeGemini.concurrent = _FakeGemini.max_concurrent = 0
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _embed(self, limiter, count):
+        service = EmbeddingService(api_base=f"http://127.0.0.1:{self.server.server_port}", cache=None)
+
+        async def run():
+            return await asyncio.gather(*(service.generate_embedding(f"text {i}") for i in range(count)))
+
+        with mock.patch.object(embedder, "gemini_limiter", limiter):
+            return asyncio.run(run())
+
+    def test_retries_429_from_fake_endpoint(self):
+        _FakeGemini.throttle = 3
+        limiter = RateLimiter(rpm=0, tpm=0, max_concurrency=2, max_retries=5, backoff_base=0.01)
+
+        results = self._embed(limiter, 4)
+
+        self.assertEqual(results, [VECTOR] * 4)
+        stats = limiter.stats()
+        self.assertEqual((stats["rate_limited"], stats["retries"], stats["succeeded"]), (3, 3, 4))
+        self.assertEqual(stats["requests"], 7)
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertLessEqual(_FakeGemini.max_concurrent, 2)
+
+    def test_gives_up_after_max_retries(self):
+        _FakeGemini.throttle = 100
+        limiter = RateLimiter(rpm=0, tpm=0, max_retries=2, backoff_base=0.01)
+
+        with self.assertRaises(Exception) as ctx:
+            self._embed(limiter, 1)
+
+        self.assertEqual(ctx.exception.response.status_code, 429)
+        self.assertEqual(limiter.stats()["requests"], 3)
+        self.assertEqual(limiter.stats()["failed"], 1)
+
+    def test_non_rate_limit_errors_are_not_retried(self):
+        limiter = RateLimiter(rpm=0, tpm=0)
+
+        async def boom():
+            raise ValueError("bad request")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(limiter.call(boom))
+        self.assertEqual((limiter.stats()["requests"], limiter.stats()["retries"]), (1, 0))
+
+
+class BudgetTests(unittest.TestCase):
+    def test_token_bucket_spaces_requests_beyond_burst(self):
+        bucket = TokenBucket(per_minute=600)  # 10/s with a burst of 600
+        bucket._tokens = 1
+
+        async def run():
+            start = time.monotonic()
+            await bucket.acquire()
+            await bucket.acquire()
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(run()), 0.09)
+
+    def test_retry_after_and_backoff(self):
+        class Throttled(Exception):
+            pass
+
+        self.assertEqual(retry_after_seconds(Throttled("429 Resource exhausted. Please retry in 7.5s.")), 7.5)
+        self.assertEqual(retry_after_seconds(Throttled("retry_delay { seconds: 12 }")), 12.0)
+        self.assertIsNone(retry_after_seconds(Throttled("429")))
+
+        limiter = RateLimiter(backoff_base=1, backoff_max=4)
+        delays = [limiter.backoff_delay(5) for _ in range(50)]
+        self.assertTrue(all(0 <= d <= 4 for d in delays))
+        self.assertGreater(len(set(delays)), 1)
+        self.assertEqual(limiter.backoff_delay(0, retry_after=30), 30)
+
+    def test_estimate_tokens(self):
+        self.assertEqual(estimate_tokens("x" * 400), 100)
+        self.assertEqual(estimate_tokens(["x" * 40, {"mime_type": "application/pdf", "data": b"%PDF"}]), 268)
+        self.assertEqual(estimate_tokens([{"parts": [{"text": "x" * 8}]}]), 2)
+
+    @unittest.skipUnless(fitz, "PyMuPDF not installed")
+    def test_estimate_tokens_counts_pdf_pages(self):
+        doc = fitz.open()
+        for _ in range(12):
+            doc.new_page().insert_text((36, 72), "Revenue 1,234")
+        pdf = doc.tobytes()
+        doc.close()
+
+        self.assertEqual(estimate_tokens({"mime_type": "application/pdf", "data": pdf}), 12 * 258)
+        inline = {"inline_data": {"mime_type": "application/pdf", "data": base64.b64encode(pdf).decode()}}
+        self.assertEqual(estimate_tokens({"parts": [inline]}), 12 * 258)
+        self.assertEqual(estimate_tokens(pdf), 12 * 258)
+        self.assertEqual(estimate_tokens({"mime_type": "image/png", "data": b"\x89PNG" * 1000}), 258)
+        self.assertEqual(estimate_tokens({"mime_type": "text/html", "data": b"x" * 4000}), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
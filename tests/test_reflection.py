@@ -0,0 +1,45 @@
+import unittest
+
+from app.services.distill_engine import FinDistillAdapter
+from app.services.reflection import ReflectionEngine
+
+
+class ReflectionEngineTests(unittest.TestCase):
+    def test_only_changed_facts_are_recritiqued(self):
+        adapter = FinDistillAdapter()
+        calls = []
+
+        def critique(fact):
+            calls.append(fact.get("metric"))
+            return adapter._critique_fact(fact)
+
+        engine = ReflectionEngine(critique, adapter._repair_fact, adapter._fact_signature)
+        facts = [
+            {"entity": "ACME", "metric": "revenue", "value": 100, "confidence": "high", "validation_status": "ok"},
+            {"entity": "ACME", "metric": "revenue decrease", "value": "12", "confidence": "high"},
+        ]
+        outcome = engine.run(facts, max_rounds=3)
+
+        # Round 1 critiques both facts; afterwards only the inverted fact changed.
+        self.assertEqual(calls, ["revenue", "revenue decrease", "revenue decrease"])
+        self.assertEqual(outcome.rounds_executed, 2)
+        self.assertEqual(outcome.history[0]["error_report"], {"relation_inversion": 1})
+        self.assertEqual(outcome.history[1]["error_report"], {})
+        self.assertLess(outcome.facts[1]["value"], 0)
+
+    def test_reflection_does_not_mutate_input(self):
+        adapter = FinDistillAdapter()
+        facts = [
+            {"entity": "ACME", "metric": "revenue", "value": "1,000", "period": "2024", "tags": ["x"]},
+            {"entity": "ACME", "metric": "revenue", "value": "1,000", "period": "2024", "tags": ["x"]},
+        ]
+        reflected, summary = adapter._self_reflect_facts(facts, max_rounds=2)
+
+        self.assertEqual(len(reflected), 1)
+        self.assertNotIn("confidence", facts[0])
+        self.assertIsNot(reflected[0], facts[0])
+        self.assertEqual(summary["history"][0]["output_count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import io
+import unittest
+from decimal import Decimal
+
+import pandas as pd
+
+from vendor.findistill.services.spreadsheet_parser import SpreadsheetParser
+
+INCOME = [
+    ["Acme Corp", None, None],
+    ["(in millions)", None, None],
+    ["Line item", "FY2024", "FY2023"],
+    ["Revenue", 1500, "1,200"],
+    ["Net income", "(50)", 80],
+    ["EPS diluted", 1.25, 0.9],
+    [None, 7, 8],
+    ["Gross margin", "-", "n/a"],
+]
+
+BALANCE = [
+    ["Item", "Dec 31, 2024", "Dec 31, 2023"],
+    ["Total assets", 2500, 2400],
+    ["Shares outstanding", 300, 310],
+]
+
+
+def _xlsx(sheets):
+    buf = io.BytesIO()
+    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
+        for name, rows in sheets.items():
+            pd.DataFrame(rows).to_excel(writer, sheet_name=name, header=False, index=False)
+    return buf.getvalue()
+
+
+def _key(facts):
+    return [(f.concept, f.period, f.value, f.unit) for f in facts]
+
+
+class SpreadsheetParserTests(unittest.TestCase):
+    def test_reads_every_sheet_with_its_own_header(self):
+        facts = SpreadsheetParser(_xlsx({"Income": INCOME, "Balance": BALANCE}), "xlsx").parse()
+
+        self.assertEqual(
+            [(f.concept, f.period, f.raw_value) for f in facts],
+            [
+                ("Revenue", "CY", "1500"), ("Revenue", "PY_2023", "1,200"),
+                ("Netincome", "CY", "(50)"), ("Netincome", "PY_2023", "80"),
+                ("EPSdiluted", "CY", "1.25"), ("EPSdiluted", "PY_2023", "0.9"),
+                ("Totalassets", "CY", "2500"), ("Totalassets", "PY_2023", "2400"),
+                ("Sharesoutstanding", "CY", "300"), ("Sharesoutstanding", "PY_2023", "310"),
+            ],
+        )
+        revenue, net_income = facts[0], facts[2]
+        # "(in millions)" scales the income sheet only; the balance sheet infers millions from magnitude.
+        self.assertEqual(revenue.value, Decimal("1.5"))
+        self.assertEqual(net_income.value, Decimal("-0.05"))
+        self.assertEqual(facts[4].unit, "ratio")
+        self.assertEqual(facts[6].value, Decimal("2.5"))
+        self.assertEqual(facts[8].unit, "shares")
+
+    def test_chunk_size_does_not_change_output(self):
+        data = _xlsx({"Income": INCOME, "Balance": BALANCE})
+        expected = _key(SpreadsheetParser(data, "xlsx").parse())
+        for chunk_rows in (1, 2, 5):
+            self.assertEqual(_key(SpreadsheetParser(data, "xlsx", chunk_rows=chunk_rows).parse()), expected)
+
+    def test_csv_matches_single_sheet_workbook(self):
+        csv = pd.DataFrame(INCOME).to_csv(header=False, index=False).encode()
+        self.assertEqual(
+            _key(SpreadsheetParser(csv, "csv", chunk_rows=3).parse()),
+            _key(SpreadsheetParser(_xlsx({"Income": INCOME}), "xlsx").parse()),
+        )
+
+    def test_sheet_without_year_columns_is_skipped(self):
+        data = _xlsx({"Notes": [["Note", "Text"], ["1", "Basis of presentation"]], "Balance": BALANCE})
+        self.assertEqual({f.concept for f in SpreadsheetParser(data, "xlsx").parse()}, {"Totalassets", "Sharesoutstanding"})
+
+
+if __name__ == "__main__":
+    unittest.main()
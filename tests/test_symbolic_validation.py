@@ -0,0 +1,128 @@
+import unittest
+
+from app.services.distill_engine import FinDistillAdapter
+from app.services.symbolic_validation import (
+    SymbolicRule,
+    SymbolicValidator,
+    calculation_rules_to_identities,
+    concept_key,
+)
+
+
+def _mismatched(facts):
+    return [f for f in facts if "symbolic_mismatch" in f.get("tags", [])]
+
+
+class SymbolicValidatorTests(unittest.TestCase):
+    def test_identities_are_checked_per_period_and_entity(self):
+        adapter = FinDistillAdapter()
+        facts = [
+            {"entity": "ACME", "period": "2023", "metric": "revenue", "value": 100},
+            {"entity": "ACME", "period": "2023", "metric": "expenses", "value": 60},
+            {"entity": "ACME", "period": "2023", "metric": "net income", "value": 40},
+            {"entity": "ACME", "period": "2024", "metric": "revenue", "value": 120},
+            {"entity": "ACME", "period": "2024", "metric": "expenses", "value": 70},
+            {"entity": "ACME", "period": "2024", "metric": "net income", "value": 10},
+            {"entity": "BETA", "period": "2024", "metric": "revenue", "value": 50},
+            {"entity": "BETA", "period": "2024", "metric": "expenses", "value": 20},
+            {"entity": "BETA", "period": "2024", "metric": "net income", "value": 30},
+        ]
+
+        validated = adapter._validate_with_symbolic_logic(facts)
+
+        flagged = _mismatched(validated)
+        self.assertEqual({(f["entity"], f["period"]) for f in flagged}, {("ACME", "2024")})
+        self.assertEqual(len(flagged), 3)
+        self.assertTrue(all(f["confidence"] == "low" for f in flagged))
+        self.assertNotIn("tags", facts[5])  # input facts are not mutated
+        self.assertIs(validated[0], facts[0])
+
+    def test_registered_identity_is_evaluated(self):
+        adapter = FinDistillAdapter()
+        adapter.register_identity(
+            SymbolicRule(
+                rule_id="ebitda_calc",
+                target_metric="EBITDA",
+                component_metrics=["operating income", "depreciation"],
+                operation="sum",
+                description="EBITDA = Operating Income + Depreciation",
+            )
+        )
+        facts = [
+            {"metric": "ebitda", "value": "500"},
+            {"metric": "operating income", "value": "300"},
+            {"metric": "depreciation", "value": "100"},
+        ]
+
+        validated, summary = adapter._self_reflect_facts(facts, max_rounds=1)
+
+        self.assertEqual(len(_mismatched(validated)), 3)
+        self.assertEqual(
+            summary["symbolic_report"]["rules_triggered"],
+            {"EBITDA = Operating Income + Depreciation": 3},
+        )
+        # Registration is per adapter instance.
+        self.assertEqual(_mismatched(FinDistillAdapter()._validate_with_symbolic_logic(facts)), [])
+
+    def test_unsupported_operation_is_rejected(self):
+        with self.assertRaises(ValueError):
+            SymbolicValidator().register_identity(
+                SymbolicRule("bad", "a", ["b"], "ratio", "A = B ratio")
+            )
+
+    def test_xbrl_calculation_rules_use_weights(self):
+        cal = [
+            ("us-gaap_GrossProfit", "us-gaap_Revenues", 1.0),
+            ("us-gaap_GrossProfit", "us-gaap_CostOfRevenue", -1.0),
+        ]
+        rules = calculation_rules_to_identities(cal)
+        self.assertEqual(len(rules), 1)
+        self.assertEqual(rules[0].target_metric, "grossprofit")
+        self.assertEqual(concept_key("ifrs-full:Revenue"), "revenue")
+
+        facts = [
+            {"concept": "Revenues", "period": "CY", "value": "10.0"},
+            {"concept": "CostOfRevenue", "period": "CY", "value": "6.0"},
+            {"concept": "GrossProfit", "period": "CY", "value": "4.0"},
+            {"concept": "Revenues", "period": "PY", "value": "9.0"},
+            {"concept": "CostOfRevenue", "period": "PY", "value": "6.0"},
+            {"concept": "GrossProfit", "period": "PY", "value": "5.0"},
+        ]
+        validated = FinDistillAdapter()._validate_with_symbolic_logic(facts, cal)
+
+        self.assertEqual([f["period"] for f in _mismatched(validated)], ["PY", "PY", "PY"])
+        self.assertIn("XBRL calculation: grossprofit", validated[3]["reflection_issues"][0])
+
+    def test_repeated_calculation_arcs_count_once(self):
+        income, segments = "http://acme.example/role/Income", "http://acme.example/role/Segments"
+        cal = [
+            ("us-gaap_Revenues", "us-gaap_ProductRevenue", 1.0, income),
+            ("us-gaap_Revenues", "us-gaap_ServiceRevenue", 1.0, income),
+            ("us-gaap_Revenues", "us-gaap_ProductRevenue", 1.0, income),  # same arc twice in one role
+            ("us-gaap_Revenues", "us-gaap_ProductRevenue", 1.0, segments),  # and again in another role
+            ("us-gaap_Revenues", "us-gaap_ServiceRevenue", 1.0, segments),
+        ]
+        rules = calculation_rules_to_identities(cal)
+        self.assertEqual([(r.component_metrics, r.weights) for r in rules],
+                         [(["productrevenue", "servicerevenue"], [1.0, 1.0])])
+
+        facts = [
+            {"concept": "Revenues", "period": "CY", "value": "300"},
+            {"concept": "ProductRevenue", "period": "CY", "value": "200"},
+            {"concept": "ServiceRevenue", "period": "CY", "value": "100"},
+        ]
+        self.assertEqual(_mismatched(FinDistillAdapter()._validate_with_symbolic_logic(facts, cal)), [])
+
+    def test_segment_facts_do_not_overwrite_consolidated_values(self):
+        cal = [("us-gaap_Revenues", "us-gaap_ProductRevenue", 1.0), ("us-gaap_Revenues", "us-gaap_ServiceRevenue", 1.0)]
+        facts = [
+            {"concept": "Revenues", "period": "CY", "value": "300", "dimensions": {}},
+            {"concept": "ProductRevenue", "period": "CY", "value": "200", "dimensions": {}},
+            {"concept": "ServiceRevenue", "period": "CY", "value": "100", "dimensions": {}},
+            {"concept": "Revenues", "period": "CY", "value": "40", "dimensions": {"ProductOrService": "Auto"}},
+        ]
+        self.assertEqual(_mismatched(FinDistillAdapter()._validate_with_symbolic_logic(facts, cal)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from vendor.findistill.services import vector_index as vi
+from vendor.findistill.services.embedder import EmbeddingService
+from vendor.findistill.services.vector_index import VectorIndex, index_distilled
+
+DIM = 16
+
+
+def _clustered(n, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(50, DIM))
+    return (centers[rng.integers(0, 50, n)] + 0.1 * rng.normal(size=(n, DIM))).astype(np.float32)
+
+
+class _FakeEmbedder:
+    """generate_embeddings stand-in: a deterministic vector per text, zeros for blanks."""
+
+    create_document_text = EmbeddingService.create_document_text
+
+    def __init__(self):
+        self.calls = []
+
+    async def generate_embeddings(self, texts):
+        self.calls.append(list(texts))
+        out = np.zeros((len(texts), DIM), dtype=np.float32)
+        for i, text in enumerate(texts):
+            if text.strip():
+                out[i] = np.random.default_rng(abs(hash(text)) % 2**32).normal(size=DIM)
+        return out
+
+
+class VectorIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _index(self, **kwargs):
+        return VectorIndex(self.tmp.name, dim=DIM, **kwargs)
+
+    def test_exact_search_filters_and_incremental_updates(self):
+        vectors = _clustered(300)
+        index = self._index()
+        index.add(
+            [f"v{i}" for i in range(300)],
+            vectors,
+            [{"case_id": f"case-{i % 3}", "company": "ACME" if i % 2 else "Globex"} for i in range(300)],
+        )
+
+        self.assertEqual(index.search(vectors[42], k=1)[0]["id"], "v42")
+        hits = index.search(vectors[42], k=5, filters={"case_id": "case-1", "company": "Globex"})
+        self.assertEqual(len(hits), 5)
+        self.assertTrue(all(int(h["id"][1:]) % 6 == 4 for h in hits))
+        self.assertEqual(index.search(vectors[42], filters={"company": "Initech"}), [])
+        with self.assertRaises(ValueError):
+            index.search(vectors[42], filters={"sector": "tech"})
+
+        index.delete(["v42"])
+        self.assertNotEqual(index.search(vectors[42], k=1)[0]["id"], "v42")
+        # Re-adding an id replaces its vector and metadata.
+        index.add(["v7"], vectors[42:43], [{"case_id": "case-9"}])
+        hit = index.search(vectors[42], k=1)[0]
+        self.assertEqual((hit["id"], hit["metadata"]), ("v7", {"case_id": "case-9"}))
+        self.assertEqual(len(index), 299)
+
+    def test_reopen_replays_log_and_ignores_torn_line(self):
+        vectors = _clustered(50)
+        index = self._index()
+        index.add([f"v{i}" for i in range(50)], vectors, [{"period": "2024"}] * 50)
+        index.delete(["v3"])
+        index.close()
+        with open(os.path.join(self.tmp.name, "meta.jsonl"), "a") as f:
+            f.write('{"op": "add", "row": 50, "id": "v5')  # interrupted append
+
+        reopened = self._index()
+        self.assertEqual(reopened.stats()["vectors"], 49)
+        self.assertEqual(reopened.search(vectors[10], k=1, filters={"period": 2024})[0]["id"], "v10")
+        self.assertNotIn("v3", [h["id"] for h in reopened.search(vectors[3], k=5)])
+        reopened.add(["extra"], vectors[3:4])
+        reopened.close()
+        self.assertEqual(self._index().search(vectors[3], k=1)[0]["id"], "extra")
+
+    def test_ivf_is_trained_incrementally_and_persisted(self):
+        vectors = _clustered(3000)
+        metadata = [{"case_id": "rare" if i % 500 == 0 else "common"} for i in range(3000)]
+        with mock.patch.object(vi, "IVF_MIN_TRAIN", 1000):
+            index = self._index(nprobe=4)
+            for start in range(0, 3000, 500):
+                index.add([f"v{i}" for i in range(start, start + 500)], vectors[start:start + 500], metadata[start:start + 500])
+
+            self.assertTrue(index.wait(timeout=60))  # training runs on the maintenance thread
+            self.assertGreater(index.stats()["lists"], 0)
+            found = sum(index.search(vectors[i], k=1)[0]["id"] == f"v{i}" for i in range(0, 3000, 30))
+            self.assertGreaterEqual(found, 95)
+            # Selective filters are answered exactly, whatever lists they fall in.
+            self.assertEqual(sorted(h["id"] for h in index.search(vectors[1], k=10, filters={"case_id": "rare"})),
+                             sorted(f"v{i}" for i in range(0, 3000, 500)))
+            index.close()
+
+            reopened = self._index(nprobe=4)
+            self.assertEqual(reopened.stats()["lists"], index.stats()["lists"])
+            self.assertEqual(reopened.search(vectors[1234], k=1)[0]["id"], "v1234")
+
+    def test_tombstones_are_compacted_in_the_background(self):
+        vectors = _clustered(400)
+        with mock.patch.object(vi, "IVF_MIN_TRAIN", 100), mock.patch.object(vi, "COMPACT_MIN_DEAD", 50):
+            index = self._index(nprobe=4)
+            index.add([f"v{i}" for i in range(400)], vectors, [{"case_id": f"case-{i % 4}"} for i in range(400)])
+            self.assertTrue(index.wait(timeout=60))
+            index.delete([f"v{i}" for i in range(0, 400, 2)])
+            self.assertTrue(index.wait(timeout=60))
+
+            stats = index.stats()
+            self.assertEqual((stats["vectors"], stats["rows_on_disk"]), (200, 200))
+            self.assertEqual(sum(1 for _ in open(os.path.join(self.tmp.name, "meta.jsonl"))), 200)
+            self.assertEqual(index.search(vectors[201], k=1)[0]["id"], "v201")
+            self.assertEqual(index.search(vectors[201], k=3, filters={"case_id": "case-1"})[0]["id"], "v201")
+            index.add(["new"], vectors[200:201])
+            index.close()
+
+            reopened = self._index(nprobe=4)
+            self.assertEqual(reopened.stats()["vectors"], 201)
+            self.assertEqual(reopened.search(vectors[200], k=1)[0]["id"], "new")
+            self.assertEqual(reopened.search(vectors[399], k=1)[0]["id"], "v399")
+            self.assertEqual([n for n in os.listdir(self.tmp.name) if "compact" in n], [])
+
+    def test_rows_replaced_during_compaction_survive_reopen(self):
+        vectors = _clustered(4)
+        index = self._index()
+        index.add(["X", "Y", "Z"], vectors[:3])
+        index.delete(["Z"])
+        copy = vi.np.ascontiguousarray
+        calls = []
+
+        def reindex_during_copy(array):
+            if not calls:  # first chunk copied outside the lock: X is re-indexed meanwhile
+                index.add(["X"], vectors[3:4])
+            calls.append(1)
+            return copy(array)
+
+        with mock.patch.object(vi.np, "ascontiguousarray", reindex_during_copy):
+            index.compact()
+        self.assertEqual(set(index.row_of), {"X", "Y"})
+        index.close()
+
+        reopened = self._index()
+        self.assertEqual(reopened.stats()["vectors"], 2)
+        self.assertEqual(reopened.search(vectors[3], k=1)[0]["id"], "X")
+
+    def test_index_distilled_replaces_document_rows(self):
+        index = self._index()
+        service = _FakeEmbedder()
+        result = {
+            "title": "ACME 10-K",
+            "summary": "Annual report",
+            "facts": [
+                {"entity": "ACME", "metric": "Revenue", "value": 120, "period": "2024"},
+                {"statement": "ACME Net income 15 (2024)", "period": "2024"},
+                {"entity": "", "metric": ""},
+            ],
+            "metadata": {"fiscal_year": "2024"},
+        }
+
+        count = asyncio.run(index_distilled("doc-1", result, case_id="case-1", index=index, service=service))
+        self.assertEqual(count, 3)  # document + two non-empty facts
+        self.assertEqual(service.calls[0][1:], ["ACME Revenue 120 (2024)", "ACME Net income 15 (2024)", ""])
+        query = service.calls[0][1]
+        hit = index.search((asyncio.run(service.generate_embeddings([query])))[0], k=1, filters={"kind": "fact"})[0]
+        self.assertEqual(hit["id"], "doc-1#fact-0")
+        self.assertEqual({k: hit["metadata"][k] for k in ("company", "case_id", "period")},
+                         {"company": "ACME", "case_id": "case-1", "period": "2024"})
+
+        result["facts"] = result["facts"][:1]
+        asyncio.run(index_distilled("doc-1", result, case_id="case-1", index=index, service=service))
+        self.assertEqual(len(index), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import io
+import unittest
+
+from vendor.findistill.services.xbrl_semantic_engine import XBRLSemanticEngine
+
+INSTANCE = b"""<?xml version="1.0" encoding="utf-8"?>
+<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance" xmlns:us-gaap="http://fasb.org/us-gaap/2023"
+            xmlns:dei="http://xbrl.sec.gov/dei/2023" xmlns:xbrldi="http://xbrl.org/2006/xbrldi">
+  <us-gaap:Revenues contextRef="c_cy" unitRef="USD" decimals="-6">1200000000</us-gaap:Revenues>
+  <dei:EntityRegistrantName contextRef="c_cy">Acme Motors Corp</dei:EntityRegistrantName>
+  <xbrli:context id="c_cy"><xbrli:entity><xbrli:identifier scheme="x">1</xbrli:identifier></xbrli:entity>
+    <xbrli:period><xbrli:instant>2024-12-31</xbrli:instant></xbrli:period></xbrli:context>
+  <xbrli:context id="c_py"><xbrli:entity><xbrli:identifier scheme="x">1</xbrli:identifier></xbrli:entity>
+    <xbrli:period><xbrli:instant>2023-12-31</xbrli:instant></xbrli:period></xbrli:context>
+  <xbrli:context id="c_seg"><xbrli:entity><xbrli:identifier scheme="x">1</xbrli:identifier>
+    <xbrli:segment><xbrldi:explicitMember dimension="us-gaap:StatementBusinessSegmentsAxis">us-gaap:AutoMember</xbrldi:explicitMember></xbrli:segment>
+    </xbrli:entity><xbrli:period><xbrli:instant>2024-12-31</xbrli:instant></xbrli:period></xbrli:context>
+  <us-gaap:Revenues contextRef="c_py" unitRef="USD" decimals="-6">1000000000</us-gaap:Revenues>
+  <us-gaap:Revenues contextRef="c_seg" unitRef="USD" decimals="-6">400000000</us-gaap:Revenues>
+  <us-gaap:NetIncomeLoss contextRef="c_cy" unitRef="USD" decimals="-6">90000000</us-gaap:NetIncomeLoss>
+  <us-gaap:SharesOutstanding contextRef="c_cy" unitRef="shares" decimals="INF">5000</us-gaap:SharesOutstanding>
+  <us-gaap:SomeTuple><us-gaap:OtherIncome contextRef="c_py" unitRef="USD" decimals="-3">7000</us-gaap:OtherIncome></us-gaap:SomeTuple>
+</xbrli:xbrl>
+"""
+
+
+class XBRLStreamingTests(unittest.TestCase):
+    def test_streaming_matches_in_memory_parse(self):
+        dom = XBRLSemanticEngine(file_path="").process_joint(INSTANCE, streaming=False)
+        stream = XBRLSemanticEngine(file_path="").process_joint(INSTANCE, streaming=True)
+
+        self.assertTrue(stream.success)
+        self.assertEqual(stream.facts, dom.facts)
+        self.assertEqual(stream.reasoning_qa, dom.reasoning_qa)
+        self.assertEqual(list(stream.jsonl_data), list(dom.jsonl_data))
+        self.assertEqual(stream.company_name, "Acme Motors Corp")
+        # A fact before the <context> elements still resolves its period.
+        self.assertEqual([(f.concept, f.period) for f in stream.facts][:2], [("Revenues", "CY"), ("Revenues", "PY")])
+        self.assertIn("StatementBusinessSegments:Auto", stream.facts[2].label)
+
+    def test_file_object_source_uses_streaming(self):
+        engine = XBRLSemanticEngine(file_path="")
+        result = engine.process_joint(io.BytesIO(INSTANCE))
+        self.assertEqual(len(result.facts), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()